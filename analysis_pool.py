@@ -0,0 +1,83 @@
+"""
+analysis_pool.py
+================
+A process pool of UCI engines for analysing many positions at once
+(post-game review, batch annotation).
+
+Every worker process starts its own engine once, in the pool initializer,
+and keeps it for all the positions it is given, so a game's positions are
+spread over all cores instead of queueing behind one Stockfish. Results
+come back per position as they finish.
+
+Usage:
+    pool = AnalysisPool("stockfish.exe", workers=7, options={"Threads": 1})
+    futures = pool.analyse_many(fens, chess.engine.Limit(time=0.3),
+                                lambda fen, info, error: ...)
+    ...
+    pool.shutdown()
+
+info is the usual analyse() dict cut down to {"score", "pv", "depth"}.
+The callback runs on the pool's result thread, not the caller's.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import util
+
+import chess
+import chess.engine
+
+_engine = None      # this worker process's engine
+
+
+def _init_worker(command, options):
+    global _engine
+    _engine = chess.engine.SimpleEngine.popen_uci(command)
+    if options:
+        _engine.configure(options)
+    # Pool workers leave through os._exit, which skips atexit; finalizers
+    # registered with an exit priority still run.
+    util.Finalize(_engine, _engine.quit, exitpriority=10)
+
+
+def _analyse_fen(job) -> dict:
+    fen, limit = job
+    info = _engine.analyse(chess.Board(fen), limit)
+    return {"score": info["score"], "pv": info.get("pv", []), "depth": info.get("depth")}
+
+
+class AnalysisPool:
+    """ProcessPoolExecutor whose workers each own one engine."""
+
+    def __init__(self, command, workers: int = None, options: dict = None):
+        self.workers = max(1, workers or (os.cpu_count() or 2) - 1)
+        self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                         initializer=_init_worker,
+                                         initargs=(command, options))
+
+    def submit(self, fen: str, limit: chess.engine.Limit):
+        """Future of the info dict for one position."""
+        return self._pool.submit(_analyse_fen, (fen, limit))
+
+    def analyse_many(self, fens, limit: chess.engine.Limit, callback) -> list:
+        """
+        Analyse every FEN; callback(fen, info, error) is called as each one
+        finishes (error is None on success). Returns the futures, which can
+        be cancelled.
+        """
+        futures = []
+        for fen in fens:
+            future = self.submit(fen, limit)
+
+            def _done(f, fen=fen):
+                if f.cancelled():
+                    return
+                error = f.exception()
+                callback(fen, None if error else f.result(), error)
+
+            future.add_done_callback(_done)
+            futures.append(future)
+        return futures
+
+    def shutdown(self, wait: bool = False):
+        self._pool.shutdown(wait=wait, cancel_futures=True)
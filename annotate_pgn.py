@@ -0,0 +1,184 @@
+"""
+annotate_pgn.py
+===============
+Headless batch annotator: grades every move of every game with the same
+coach the GUI uses and writes annotated PGN.
+
+Games are streamed from the input files one at a time. Their positions are
+analysed by a pool of engine worker processes (analysis_pool.AnalysisPool),
+with up to --ahead games in flight so every worker stays busy, and games
+are written out in input order as soon as they are complete. Each move gets:
+
+    NAG      ?! inaccuracy, ? mistake, ?? blunder
+    comment  for those moves: the coach's verdict, its tips (White's moves;
+             the coach speaks to White) and the better move
+
+Usage:
+    python annotate_pgn.py games.pgn -o annotated.pgn
+    python annotate_pgn.py openings/ -o out.pgn --workers 8 --time 0.2
+"""
+
+import argparse
+import sys
+import time
+from collections import deque
+from pathlib import Path
+
+import chess
+import chess.engine
+import chess.pgn
+
+from analysis_pool import AnalysisPool
+from coach import GRADE_HEADERS, grade_move, mover_drop
+from coach_cache import CoachCache
+from engine_resources import cpu_cores
+from engine_service import engine_command
+
+DEFAULT_ENGINE = "stockfish/stockfish-windows-x86-64-avx2.exe"
+
+GRADE_NAGS = {"inaccuracy": chess.pgn.NAG_DUBIOUS_MOVE,
+              "mistake": chess.pgn.NAG_MISTAKE,
+              "blunder": chess.pgn.NAG_BLUNDER}
+
+
+def iter_games(paths):
+    """Yield every game of every .pgn file (folders are searched for *.pgn)."""
+    for path in paths:
+        path = Path(path)
+        files = sorted(path.glob("*.pgn")) if path.is_dir() else [path]
+        for pgn_file in files:
+            with open(pgn_file, encoding="utf-8", errors="ignore") as f:
+                while True:
+                    game = chess.pgn.read_game(f)
+                    if game is None:
+                        break
+                    yield game
+
+
+def _cp(info) -> float:
+    return float(info["score"].white().score(mate_score=3000) or 0)
+
+
+def annotate_game(game: chess.pgn.Game, evals: dict, coach_cache: CoachCache) -> dict:
+    """Add NAGs and coach comments to game in place -> {grade: count}."""
+    counts = {}
+    board = game.board()
+    for node in game.mainline():
+        move = node.move
+        before = evals.get(board.fen())
+        mover = board.turn
+        board_before = board.copy(stack=False)
+        board.push(move)
+        after = evals.get(board.fen())
+        if before is None or after is None:
+            continue
+
+        best = before["pv"][0] if before.get("pv") else None
+        drop = mover_drop(mover, _cp(before), _cp(after))
+        grade = grade_move(drop, move == best)
+        counts[grade] = counts.get(grade, 0) + 1
+        if grade not in GRADE_NAGS:
+            continue
+
+        node.nags.add(GRADE_NAGS[grade])
+        lines = [GRADE_HEADERS[grade]]
+        if mover == chess.WHITE:
+            lines.extend(coach_cache.explain_move(move, board_before, drop, best))
+        if best is not None:
+            lines.append(f"Better: {board_before.san(best)}")
+        comment = " ".join(lines)
+        node.comment = f"{node.comment} {comment}".strip() if node.comment else comment
+    return counts
+
+
+def _positions(game: chess.pgn.Game) -> list:
+    board = game.board()
+    fens = [board.fen()]
+    for move in game.mainline_moves():
+        board.push(move)
+        fens.append(board.fen())
+    return fens
+
+
+def annotate(paths, output, engine, limit: chess.engine.Limit, workers: int,
+             ahead: int, report_every: float = 2.0):
+    pool = AnalysisPool(engine, workers=workers, options={"Threads": 1, "Hash": 16})
+    coach_cache = CoachCache()  # the same mistakes recur across games
+    print(f"Annotating with {pool.workers} engine worker(s), "
+          f"{limit.time or '-'}s / depth {limit.depth or '-'} per position", file=sys.stderr)
+
+    out = open(output, "w", encoding="utf-8") if output != "-" else sys.stdout
+    pending = deque()           # (game, {fen: future}) in input order
+    games_done = positions_done = 0
+    totals = {}
+    t0 = last_report = time.perf_counter()
+
+    def submit(game):
+        futures = {}
+        for fen in _positions(game):
+            if fen not in futures:
+                futures[fen] = pool.submit(fen, limit)
+        pending.append((game, futures))
+
+    def flush(keep: int):
+        """Write finished games in order; block while more than keep are pending."""
+        nonlocal games_done, positions_done
+        while pending:
+            game, futures = pending[0]
+            if len(pending) <= keep and not all(f.done() for f in futures.values()):
+                return
+            evals = {}
+            for fen, f in futures.items():
+                try:
+                    evals[fen] = f.result()
+                except Exception as e:
+                    print(f"  analysis failed for {fen}: {e}", file=sys.stderr)
+            pending.popleft()
+            for grade, n in annotate_game(game, evals, coach_cache).items():
+                totals[grade] = totals.get(grade, 0) + n
+            print(game, file=out, end="\n\n")
+            games_done += 1
+            positions_done += len(futures)
+
+    def report(final=False):
+        elapsed = max(time.perf_counter() - t0, 1e-9)
+        print(f"{'Done' if final else '  '} {games_done:,} games, {positions_done:,} positions "
+              f"in {elapsed:.1f}s ({games_done / elapsed:,.2f} games/s, "
+              f"{positions_done / elapsed:,.1f} positions/s)", file=sys.stderr)
+
+    try:
+        for game in iter_games(paths):
+            submit(game)
+            flush(keep=ahead)
+            now = time.perf_counter()
+            if now - last_report >= report_every:
+                report()
+                last_report = now
+        flush(keep=0)
+    finally:
+        pool.shutdown()
+        if out is not sys.stdout:
+            out.close()
+    report(final=True)
+    if totals:
+        print("Grades: " + ", ".join(f"{g} {n:,}" for g, n in sorted(totals.items())),
+              file=sys.stderr)
+    print(coach_cache.summary(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Annotate PGN files with the chess coach.")
+    ap.add_argument("inputs", nargs="+", help="PGN files or folders of PGN files")
+    ap.add_argument("-o", "--output", default="annotated.pgn", help="output PGN ('-' = stdout)")
+    ap.add_argument("--engine", default=DEFAULT_ENGINE, help="UCI engine executable (or a .py engine such as fake_uci.py)")
+    ap.add_argument("--workers", type=int, default=max(1, cpu_cores() - 1),
+                    help="engine worker processes")
+    ap.add_argument("--time", type=float, default=0.2, help="seconds per position")
+    ap.add_argument("--depth", type=int, default=None, help="max depth per position")
+    ap.add_argument("--ahead", type=int, default=16,
+                    help="games analysed ahead of the one being written")
+    args = ap.parse_args()
+
+    annotate(args.inputs, args.output, engine_command(args.engine),
+             chess.engine.Limit(time=args.time, depth=args.depth),
+             workers=args.workers, ahead=max(1, args.ahead))
@@ -0,0 +1,101 @@
+"""
+bench_engine.py
+===============
+Nodes per second of the UCI engine for several Threads/Hash settings.
+
+Each configuration analyses the same handful of middlegame positions for a
+fixed time and reports the engine's nps (nodes / time when the engine
+doesn't send nps) and the average depth reached. The setting picked by
+engine_resources for this machine and the game's engine pool (--pool,
+test.ENGINE_POOL_SIZE by default) is always included.
+
+Usage:
+    python bench_engine.py
+    python bench_engine.py --engine stockfish/stockfish.exe --time 2 --threads 1,2,4,8 --hash 16,256
+    python bench_engine.py --pool 1           # the auto setting for a single engine
+"""
+
+import argparse
+import time
+
+import chess
+import chess.engine
+
+from engine_resources import available_memory_mb, cpu_cores, recommend
+from engine_service import engine_command
+from test import ENGINE_POOL_SIZE
+
+DEFAULT_ENGINE = "stockfish/stockfish-windows-x86-64-avx2.exe"
+
+POSITIONS = [
+    chess.STARTING_FEN,
+    "r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4",
+    "r1bq1rk1/pp2bppp/2n1pn2/2pp4/3P4/2PBPN2/PP1N1PPP/R1BQ1RK1 w - - 0 8",
+    "r2q1rk1/1b2bppp/p2ppn2/1p6/3NP3/1BN1B3/PPP2PPP/R2Q1RK1 w - - 0 12",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+]
+
+
+def _ints(text: str) -> list:
+    return [int(x) for x in text.split(",") if x.strip()]
+
+
+def bench(command, threads: int, hash_mb: int, seconds: float) -> tuple:
+    """(nps, average depth) over POSITIONS for one configuration."""
+    engine = chess.engine.SimpleEngine.popen_uci(command)
+    try:
+        engine.configure({"Threads": threads, "Hash": hash_mb})
+        nodes = depth = 0
+        elapsed = 0.0
+        for fen in POSITIONS:
+            if "Clear Hash" in engine.options:
+                engine.configure({"Clear Hash": None})
+            t0 = time.perf_counter()
+            info = engine.analyse(chess.Board(fen), chess.engine.Limit(time=seconds))
+            spent = info.get("time") or (time.perf_counter() - t0)
+            nodes   += info.get("nodes", 0)
+            depth   += info.get("depth", 0)
+            elapsed += spent
+        return nodes / max(elapsed, 1e-9), depth / len(POSITIONS)
+    finally:
+        engine.quit()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark engine nps per Threads/Hash setting.")
+    ap.add_argument("--engine", default=DEFAULT_ENGINE, help="UCI engine executable (or a .py engine such as fake_uci.py)")
+    ap.add_argument("--time", type=float, default=1.0, help="seconds per position")
+    ap.add_argument("--pool", type=int, default=ENGINE_POOL_SIZE,
+                    help="engines sharing the machine, for the auto setting (default: the game's)")
+    ap.add_argument("--threads", type=_ints, help="comma-separated Threads values")
+    ap.add_argument("--hash", type=_ints, help="comma-separated Hash values (MB)")
+    args = ap.parse_args()
+
+    cores, memory_mb = cpu_cores(), available_memory_mb()
+    auto = recommend(cores, memory_mb, pool_size=args.pool)
+    if args.threads is None:
+        args.threads = sorted({1, max(1, cores // 2), auto["Threads"], cores})
+    if args.hash is None:
+        args.hash = sorted({16, auto["Hash"]})
+
+    command = engine_command(args.engine)
+    print(f"{cores} cores, {memory_mb if memory_mb is not None else '?'} MB free; "
+          f"auto setting for a pool of {args.pool}: "
+          f"Threads={auto['Threads']} Hash={auto['Hash']}")
+    print(f"{len(POSITIONS)} positions x {args.time:g}s each\n")
+    print(f"{'Threads':>7} {'Hash':>6} {'knps':>10} {'depth':>6}")
+
+    results = []
+    for threads in args.threads:
+        for hash_mb in args.hash:
+            nps, depth = bench(command, threads, hash_mb, args.time)
+            results.append((nps, threads, hash_mb))
+            mark = "  <- auto" if (threads, hash_mb) == (auto["Threads"], auto["Hash"]) else ""
+            print(f"{threads:>7} {hash_mb:>6} {nps / 1000:>10,.0f} {depth:>6.1f}{mark}")
+
+    best = max(results)
+    print(f"\nFastest: Threads={best[1]} Hash={best[2]} ({best[0] / 1000:,.0f} knps)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+bench_reply.py
+==============
+Times ChessUltimate's engine reply pipeline (_engine_and_coach: engine
+search, coach grading and tips, next-turn eval) without the Tk window.
+
+By default it runs against fake_uci.py, so the numbers are repeatable and
+need no Stockfish: the fake engine answers after a fixed latency and the
+player's moves follow a fixed line, so every run plays the same game.
+
+Usage:
+    python bench_reply.py                        # fake engine, 50 ms latency
+    python bench_reply.py --latency 200 --pool 1 --legacy
+    python bench_reply.py --engine stockfish/stockfish-windows-x86-64-avx2.exe
+    python bench_reply.py --breakdown --dump latency.json   # per-phase percentiles
+"""
+
+import argparse
+import queue
+import statistics
+import time
+from pathlib import Path
+
+import chess
+
+import test as gui
+from coach_cache import CoachCache
+from engine_service import EngineService, engine_command
+from latency import LATENCY
+
+# White's moves while they are legal; after that the first legal move (UCI order)
+PLAYER_LINE = ["e4", "Nf3", "Bc4", "O-O", "d3", "c3", "Re1", "Nbd2", "h3", "Nf1"]
+
+
+class HeadlessCoach(gui.ChessUltimate):
+    """The engine/coach state of ChessUltimate, minus the Tk window and speech."""
+
+    def __init__(self, engine: EngineService, pool_size: int, combined: bool, coach: bool):
+        self.engine          = engine
+        self.board           = chess.Board()
+        self.skill_level     = 5
+        self.combined_search = combined
+        self.ponder_mode     = False
+        self.game_id         = 0
+        self.play_slot       = 0
+        self.coach_slot      = 1 if pool_size > 1 else 0
+        self.coach_on        = coach
+        self.pre_move_eval   = 0.0
+        self.best_move_before = None
+        self.white_time = self.black_time = gui.CLOCK_START
+        gui.load_resources()
+        self.opening_tracker = gui.OpeningTracker(gui.OPENING_TRIE)
+        self.coach_cache     = CoachCache()       # memory only: every run starts cold
+
+    def __del__(self):
+        pass
+
+
+def player_move(board: chess.Board, ply: int) -> chess.Move:
+    if ply < len(PLAYER_LINE):
+        try:
+            return board.parse_san(PLAYER_LINE[ply])
+        except ValueError:
+            pass
+    return min(board.legal_moves, key=lambda m: m.uci())
+
+
+def run(engine_path: str, moves: int, pool: int, combined: bool, coach: bool,
+        latency_ms: int) -> list:
+    options = {"Skill Level": 5}
+    if Path(engine_path).suffix == ".py":
+        options["Latency"] = latency_ms
+    service = EngineService(engine_command(engine_path), options,
+                            results=queue.Queue(), size=pool, latency=LATENCY)
+    app = HeadlessCoach(service, pool, combined, coach)
+    timings = []
+    try:
+        for ply in range(moves):
+            if app.board.is_game_over():
+                break
+            move = player_move(app.board, ply)
+            board_before = app.board.copy(stack=False)
+            app.board.push(move)
+            app.opening_tracker.push(board_before.san(move), app.board)
+            if app.board.is_game_over():
+                break
+            limit = app._engine_limit(app.board, move, in_book=app.has_book_move())
+            t0 = time.perf_counter()
+            reply = service.run(app._engine_and_coach(app.board.copy(), move,
+                                                      board_before, limit))
+            timings.append(time.perf_counter() - t0)
+            san = app.board.san(reply["move"])
+            app.board.push(reply["move"])
+            app.opening_tracker.push(san, app.board)
+            app.pre_move_eval = reply["pre_eval"] or 0.0
+            app.best_move_before = reply["best_move"]
+    finally:
+        service.close()
+    return timings
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark the engine reply + coach pipeline.")
+    ap.add_argument("--engine", default=str(Path(__file__).with_name("fake_uci.py")),
+                    help="UCI engine (default: the bundled fake_uci.py)")
+    ap.add_argument("--latency", type=int, default=50, help="fake engine latency in ms")
+    ap.add_argument("--moves", type=int, default=20, help="player moves to play")
+    ap.add_argument("--pool", type=int, default=gui.ENGINE_POOL_SIZE, help="engine processes")
+    ap.add_argument("--legacy", action="store_true",
+                    help="separate analyse/play/analyse instead of one combined search")
+    ap.add_argument("--no-coach", action="store_true", help="engine reply only")
+    ap.add_argument("--breakdown", action="store_true",
+                    help="also print per-phase latency percentiles (engine calls, coach steps)")
+    ap.add_argument("--dump", metavar="JSON", help="write the latency stats to this file")
+    args = ap.parse_args()
+
+    timings = run(args.engine, args.moves, args.pool, not args.legacy,
+                  not args.no_coach, args.latency)
+    if not timings:
+        print("No moves played.")
+        return
+    ms = sorted(t * 1000 for t in timings)
+    p95 = ms[min(len(ms) - 1, int(round(0.95 * (len(ms) - 1))))]
+    print(f"{len(ms)} replies: mean {statistics.mean(ms):.1f} ms, "
+          f"p50 {statistics.median(ms):.1f} ms, p95 {p95:.1f} ms, max {ms[-1]:.1f} ms, "
+          f"total {sum(ms) / 1000:.2f} s")
+    if args.breakdown:
+        print(LATENCY.text())
+    if args.dump:
+        LATENCY.dump(args.dump)
+
+
+if __name__ == "__main__":
+    main()
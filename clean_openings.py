@@ -5,19 +5,39 @@ Reads opening.json (259k entries, ECO codes, stripped notation),
 maps ECO → real names, deduplicates, keeps all move lengths up to 12,
 and saves clean_openings.json.
 
+It also writes Clean_openings_zobrist.json: the same book keyed by the
+polyglot Zobrist hash of the position each line reaches (hex string →
+name), so the GUI finds an opening whatever move order reached it
+(Nf3 d5 d4 and d4 d5 Nf3 are one entry).
+
+Clean_openings.bin holds that position index in a compact binary form the
+GUI memory-maps instead of parsing JSON (little-endian):
+  header   4s magic "COBK", u16 version, u16 reserved,
+           u32 record count, u32 name count, u32 offset of the name table
+  records  (u64 zobrist hash, u32 name id) × record count, sorted by hash
+  names    (u16 byte length, UTF-8 bytes) × name count, in id order
+
 The gen_openings.py script stripped x/+/# from moves so:
   cxd4 → cd4,  Nxd4 → Nd4
 We keep everything in stripped form. detect_opening in the chess
 program must also strip x/+/# before lookup.
 
-Usage:  python clean_openings.py
+Usage:  python clean_openings.py [--stream]
 Input:  opening.json
-Output: clean_openings.json
+Output: clean_openings.json, Clean_openings_zobrist.json, Clean_openings.bin
 """
 
+import argparse
+import heapq
+import itertools
 import json
+import struct
+import tempfile
 from pathlib import Path
 
+import chess
+import chess.polyglot
+
 ECO_NAMES = {
     "A00":"Uncommon Opening","A01":"Nimzowitsch-Larsen Attack",
     "A02":"Bird's Opening","A03":"Bird's Opening",
@@ -284,7 +304,104 @@ def strip_move(m: str) -> str:
     return m.replace("x","").replace("+","").replace("#","")
 
 
-def clean_openings(input_path: str, output_path: str, max_moves: int = 12):
+def more_specific(new: str, existing: str) -> bool:
+    """True if `new` is a better name than `existing` (prefer variation names with –)."""
+    new_spec = "–" in new or " – " in new
+    old_spec = "–" in existing or " – " in existing
+    if new_spec and not old_spec:
+        return True
+    return new_spec and old_spec and len(new) > len(existing)
+
+
+class LineWalker:
+    """
+    Plays book lines on one board. Fed keys in sorted order, consecutive
+    lines share their prefix (push/pop instead of replaying from scratch).
+    """
+
+    def __init__(self):
+        self.board  = chess.Board()
+        self.played = []              # tokens currently pushed on board
+
+    def position(self, tokens: list):
+        """Zobrist hash after playing `tokens`, or None if the line is illegal."""
+        common = 0
+        while (common < len(self.played) and common < len(tokens)
+               and self.played[common] == tokens[common]):
+            common += 1
+        while len(self.played) > common:
+            self.board.pop()
+            self.played.pop()
+        try:
+            for tok in tokens[common:]:
+                self.board.push(self.board.parse_san(tok))
+                self.played.append(tok)
+        except ValueError:
+            return None               # illegal / garbled line — skip it
+        return chess.polyglot.zobrist_hash(self.board)
+
+
+def build_position_index(openings: dict) -> dict:
+    """
+    Replay every book line and key its name by the Zobrist hash of the
+    final position.
+    """
+    index = {}
+    walker = LineWalker()
+    for tokens in sorted(key.split() for key in openings):
+        h = walker.position(tokens)
+        if h is None:
+            continue
+        name = openings[" ".join(tokens)]
+        if h not in index or more_specific(name, index[h]):
+            index[h] = name
+    return index
+
+
+def save_position_index(items, output_path: str):
+    """Write (hash, name) pairs, sorted by hash, as {"<hex hash>": name}."""
+    count = 0
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write("{")
+        for h, name in items:
+            f.write(f'{", " if count else ""}"{h:016x}": '
+                    f'{json.dumps(name, ensure_ascii=False)}')
+            count += 1
+        f.write("}")
+    print(f"✅ Saved {count:,} positions to {output_path}")
+
+
+BOOK_MAGIC   = b"COBK"
+BOOK_VERSION = 1
+BOOK_HEADER  = struct.Struct("<4sHHIII")
+BOOK_RECORD  = struct.Struct("<QI")
+
+
+def save_binary_book(items, output_path: str):
+    """
+    Write (hash, name) pairs, sorted by hash, as fixed-size records plus an
+    interned name table. One pass: the header is patched in at the end.
+    """
+    name_id = {}
+    count = 0
+    with open(output_path, "wb") as f:
+        f.write(b"\0" * BOOK_HEADER.size)
+        for h, name in items:
+            f.write(BOOK_RECORD.pack(h, name_id.setdefault(name, len(name_id))))
+            count += 1
+        names_offset = f.tell()
+        for name in name_id:               # dicts keep id order
+            raw = name.encode("utf-8")
+            f.write(struct.pack("<H", len(raw)) + raw)
+        f.seek(0)
+        f.write(BOOK_HEADER.pack(BOOK_MAGIC, BOOK_VERSION, 0,
+                                 count, len(name_id), names_offset))
+    print(f"✅ Saved {count:,} positions / {len(name_id):,} names to {output_path}")
+
+
+def clean_openings(input_path: str, output_path: str, max_moves: int = 12,
+                   zobrist_path: str = "Clean_openings_zobrist.json",
+                   binary_path: str = "Clean_openings.bin"):
     print(f"Loading {input_path} ...")
     with open(input_path, encoding="utf-8") as f:
         raw = json.load(f)
@@ -301,16 +418,8 @@ def clean_openings(input_path: str, output_path: str, max_moves: int = 12):
         norm_key = " ".join(strip_move(m) for m in parts)
         real_name = resolve_name(name)
         # Keep most specific (prefer variation names with –)
-        if norm_key not in resolved:
+        if norm_key not in resolved or more_specific(real_name, resolved[norm_key]):
             resolved[norm_key] = real_name
-        else:
-            existing = resolved[norm_key]
-            new_spec = "–" in real_name or " – " in real_name
-            old_spec = "–" in existing  or " – " in existing
-            if new_spec and not old_spec:
-                resolved[norm_key] = real_name
-            elif new_spec and old_spec and len(real_name) > len(existing):
-                resolved[norm_key] = real_name
 
     print(f"  After filtering/resolving (2–{max_moves} moves): {len(resolved):,}")
 
@@ -342,6 +451,210 @@ def clean_openings(input_path: str, output_path: str, max_moves: int = 12):
     for k, v in long:
         print(f"  {k!r:70} → {v}")
 
+    if zobrist_path or binary_path:
+        print("\nIndexing positions ...")
+        positions = sorted(build_position_index(final).items())
+        if zobrist_path:
+            save_position_index(positions, zobrist_path)
+        if binary_path:
+            save_binary_book(positions, binary_path)
+
+
+# ── Streaming mode ────────────────────────────────────────────────────────────
+# Same output as clean_openings(), but opening.json is read entry by entry and
+# every step that needs a global view (dedupe by key, family prefixes, the
+# short-first sort, dedupe by position) is an external sort: sorted runs of
+# at most run_size records on disk, merged with heapq. Peak memory depends on
+# run_size, not on the input size.
+
+def iter_json_object(path: str, chunk_size: int = 1 << 20):
+    """Yield the (key, value) pairs of a top-level JSON object, one at a time."""
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf-8") as f:
+        buf, pos, eof = "", 0, False
+
+        def skip_ws():
+            nonlocal buf, pos, eof
+            while True:
+                while pos < len(buf) and buf[pos] in " \t\r\n":
+                    pos += 1
+                if pos < len(buf) or eof:
+                    return
+                buf, pos = f.read(chunk_size), 0
+                eof = not buf
+
+        def decode():
+            # A value only counts as complete if something follows it
+            # (a truncated number would otherwise decode "successfully").
+            nonlocal buf, pos, eof
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buf, pos)
+                    if end < len(buf) or eof:
+                        pos = end
+                        return value
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                more = f.read(chunk_size)
+                eof = not more
+                buf, pos = buf[pos:] + more, 0
+
+        def expect(ch):
+            nonlocal pos
+            skip_ws()
+            if buf[pos:pos + 1] != ch:
+                raise ValueError(f"{path}: expected {ch!r} in JSON object")
+            pos += 1
+
+        expect("{")
+        skip_ws()
+        if buf[pos:pos + 1] == "}":
+            return
+        while True:
+            skip_ws()
+            key = decode()
+            expect(":")
+            skip_ws()
+            value = decode()
+            yield key, value
+            skip_ws()
+            if buf[pos:pos + 1] == "}":
+                return
+            expect(",")
+
+
+class ExternalSorter:
+    """Collect records, spill sorted runs to tmpdir, iterate them k-way merged."""
+
+    def __init__(self, tmpdir: str, name: str, key, run_size: int):
+        self.tmpdir, self.name, self.key = Path(tmpdir), name, key
+        self.run_size = run_size
+        self.buffer, self.runs, self.count = [], [], 0
+
+    def add(self, record):
+        self.buffer.append(record)
+        self.count += 1
+        if len(self.buffer) >= self.run_size:
+            self._spill()
+
+    def _spill(self):
+        if not self.buffer:
+            return
+        self.buffer.sort(key=self.key)
+        path = self.tmpdir / f"{self.name}-{len(self.runs)}.jsonl"
+        with open(path, "w", encoding="utf-8") as f:
+            for record in self.buffer:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.runs.append(path)
+        self.buffer = []
+
+    @staticmethod
+    def _read(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+
+    def __iter__(self):
+        self._spill()
+        return heapq.merge(*(self._read(p) for p in self.runs), key=self.key)
+
+
+def _group(records, key):
+    """Group consecutive records of a sorted stream by key -> (key, [records])."""
+    return ((k, list(g)) for k, g in itertools.groupby(records, key=key))
+
+
+def clean_openings_streaming(input_path: str, output_path: str, max_moves: int = 12,
+                             zobrist_path: str = "Clean_openings_zobrist.json",
+                             binary_path: str = "Clean_openings.bin",
+                             run_size: int = 200_000):
+    """Bounded-memory clean_openings(); the output files are identical."""
+    print(f"Streaming {input_path} (runs of {run_size:,}) ...")
+    with tempfile.TemporaryDirectory(prefix="clean_openings-") as tmp:
+        # Step 1: resolve + filter. Records: [norm_key, input order, name]
+        candidates = ExternalSorter(tmp, "candidates", lambda r: (r[0], r[1]), run_size)
+        raw_count = 0
+        for seq, (key, name) in enumerate(iter_json_object(input_path)):
+            raw_count += 1
+            parts = key.split()
+            if len(parts) < 2 or len(parts) > max_moves:
+                continue
+            norm_key = " ".join(strip_move(m) for m in parts)
+            candidates.add([norm_key, seq, resolve_name(name)])
+        print(f"  Raw entries: {raw_count:,}")
+
+        # Step 2: keep the most specific name per key (same fold, in input
+        # order, as the in-memory version) and emit family prefixes.
+        # Records: [key, 0 = resolved / 1 = family prefix, order, name]
+        entries = ExternalSorter(tmp, "entries", lambda r: (r[0], r[1], r[2]), run_size)
+        resolved_count = 0
+        for norm_key, group in _group(candidates, lambda r: r[0]):
+            first_seq, real_name = group[0][1], group[0][2]
+            for _, _, name in group[1:]:
+                if more_specific(name, real_name):
+                    real_name = name
+            resolved_count += 1
+            entries.add([norm_key, 0, first_seq, real_name])
+            parts = norm_key.split()
+            family = real_name.split("–")[0].strip()
+            for length in range(2, len(parts)):
+                entries.add([" ".join(parts[:length]), 1, first_seq, family])
+        print(f"  After filtering/resolving (2–{max_moves} moves): {resolved_count:,}")
+
+        # A key that is itself resolved wins over prefixes; among prefixes
+        # the first resolved line (in input order) wins — as in the dict merge.
+        # Keys come out sorted, which is also the order LineWalker wants.
+        # Records: [plies, 0 = family prefix / 1 = resolved, order, key, name]
+        final = ExternalSorter(tmp, "final", lambda r: (r[0], r[1], r[2]), run_size)
+        positions = ExternalSorter(tmp, "positions", lambda r: r[0], run_size)
+        walker = LineWalker()
+        for key, group in _group(entries, lambda r: r[0]):
+            _, kind, order, name = group[0]
+            tokens = key.split()
+            final.add([len(tokens), 1 - kind, order, key, name])
+            if zobrist_path or binary_path:
+                h = walker.position(tokens)
+                if h is not None:
+                    positions.add([h, name])
+        print(f"  After adding family prefixes: {final.count:,}")
+
+        # Step 3: short-first, written in json.dump(indent=2) layout
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write("{")
+            for i, (_, _, _, key, name) in enumerate(final):
+                f.write(f'{"," if i else ""}\n  {json.dumps(key, ensure_ascii=False)}: '
+                        f'{json.dumps(name, ensure_ascii=False)}')
+            f.write("\n}" if final.count else "}")
+        print(f"\n✅ Saved {final.count:,} openings to {output_path}")
+
+        if zobrist_path or binary_path:
+            def best_per_position():
+                for h, group in _group(positions, lambda r: r[0]):
+                    name = group[0][1]
+                    for _, other in group[1:]:
+                        if more_specific(other, name):
+                            name = other
+                    yield h, name
+            if zobrist_path:
+                save_position_index(best_per_position(), zobrist_path)
+            if binary_path:
+                save_binary_book(best_per_position(), binary_path)
+
 
 if __name__ == "__main__":
-    clean_openings("opening.json", "Clean_openings.json", max_moves=12)
+    ap = argparse.ArgumentParser(description="Clean opening.json into Clean_openings.json.")
+    ap.add_argument("input", nargs="?", default="opening.json")
+    ap.add_argument("output", nargs="?", default="Clean_openings.json")
+    ap.add_argument("--max-moves", type=int, default=12)
+    ap.add_argument("--stream", action="store_true",
+                    help="bounded-memory mode: external sort on disk")
+    ap.add_argument("--run-size", type=int, default=200_000,
+                    help="records per sorted run in --stream mode")
+    args = ap.parse_args()
+
+    if args.stream:
+        clean_openings_streaming(args.input, args.output, max_moves=args.max_moves,
+                                 run_size=args.run_size)
+    else:
+        clean_openings(args.input, args.output, max_moves=args.max_moves)
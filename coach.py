@@ -0,0 +1,616 @@
+"""
+coach.py
+========
+Move grading and coaching tips shared by the live coach, the post-game
+review and the batch annotator (annotate_pgn.py).
+
+A move's "drop" is how many centipawns the mover lost compared with the
+position before it, both scores from White's point of view:
+
+    drop = mover_drop(chess.WHITE, eval_before, eval_after)
+    grade = grade_move(drop, played_best=(move == engine_best))
+    tips  = explain_move(move, board_before, drop, engine_best)
+
+explain_move / why_better speak to White, the side the player has in the
+GUI. They never copy a move stack: the boards after the move and after the
+engine's best move are copy(stack=False) snapshots, and the game phase is
+board.ply(), so coaching costs the same on move 80 as on move 8. Callers
+can pass a stack-free board_before too.
+
+The heuristics work on integer bitboards rather than looping over the 64
+squares with piece_at / is_attacked_by. Each position involved in a move
+(before, after the move played, after the engine's best move) gets one
+PositionAnalysis, whose attack maps every rule and why_better reason reads:
+
+    pa = PositionAnalysis(board)
+    pa.attacks[chess.BLACK]            # every square Black attacks
+    pa.attacked(chess.BLACK, sq)       # is sq attacked by Black
+    pa.reach(sq)                       # squares the piece on sq attacks
+"""
+
+import bisect
+import time
+from collections import namedtuple
+
+import chess
+import chess.polyglot
+
+from latency import LATENCY
+from see import PIECE_VALUE, SEE_VALUE, see, see_square
+
+BLUNDER_DROP    = 250
+MISTAKE_DROP    = 100
+INACCURACY_DROP = 40
+
+GRADE_HEADERS = {
+    "best": "✅ Best move! Well done!",
+    "good": "👍 Good move!",
+    "inaccuracy": "💡 Inaccuracy – better options existed.",
+    "mistake": "⚠️ Mistake – you lost advantage.",
+    "blunder": "❌ Blunder! Significant loss.",
+}
+
+# Short move annotations (review list, PGN)
+GRADE_SYMBOLS = {"best": "!", "good": "", "inaccuracy": "?!", "mistake": "?", "blunder": "??"}
+
+# Piece values in centipawns: PIECE_VALUE, imported from see (SEE_VALUE is built from it)
+PIECE_NAME = {
+    chess.PAWN: "pawn", chess.KNIGHT: "knight", chess.BISHOP: "bishop",
+    chess.ROOK: "rook", chess.QUEEN: "queen", chess.KING: "king"
+}
+
+
+def _pawn_attacks(pawns: int, color: chess.Color) -> int:
+    if color == chess.WHITE:
+        return (((pawns & ~chess.BB_FILE_A) << 7) | ((pawns & ~chess.BB_FILE_H) << 9)) & chess.BB_ALL
+    return ((pawns & ~chess.BB_FILE_A) >> 9) | ((pawns & ~chess.BB_FILE_H) >> 7)
+
+
+class PositionAnalysis:
+    """Attack maps of one position, computed once and shared by the coach rules."""
+
+    __slots__ = ("board", "attacks", "_reach")
+
+    def __init__(self, board: chess.Board):
+        self.board = board
+        self._reach = {}                  # square -> attacks_mask of its piece
+        attacks = [0, 0]                  # indexed by color (BLACK=0, WHITE=1)
+        for color in chess.COLORS:
+            pawns = board.pawns & board.occupied_co[color]
+            mask = _pawn_attacks(pawns, color)
+            for sq in chess.scan_reversed(board.occupied_co[color] & ~pawns):
+                reach = self._reach[sq] = board.attacks_mask(sq)
+                mask |= reach
+            attacks[color] = mask
+        self.attacks = tuple(attacks)     # squares attacked (own pieces' squares included)
+
+    def attacked(self, color: chess.Color, square: int) -> bool:
+        return bool(self.attacks[color] & chess.BB_SQUARES[square])
+
+    def reach(self, square: int) -> int:
+        """Bitboard of the squares the piece on square attacks."""
+        reach = self._reach.get(square)
+        if reach is None:
+            reach = self._reach[square] = self.board.attacks_mask(square)
+        return reach
+
+
+def grade_move(drop: float, played_best: bool = False) -> str:
+    """best / good / inaccuracy / mistake / blunder from the centipawn drop."""
+    if played_best:
+        return "best"
+    if drop >= BLUNDER_DROP:
+        return "blunder"
+    if drop >= MISTAKE_DROP:
+        return "mistake"
+    if drop >= INACCURACY_DROP:
+        return "inaccuracy"
+    return "good"
+
+
+def mover_drop(mover: chess.Color, eval_before: float, eval_after: float) -> float:
+    """Centipawns the mover gave away; evals are from White's point of view."""
+    if mover == chess.WHITE:
+        return eval_before - eval_after
+    return eval_after - eval_before
+
+
+# ── Coach rules ──────────────────────────────────────────────────────────────
+# explain_move runs every registered rule on a MoveContext. A rule declares
+# its priority (rules run in that order, the most important first) and its
+# cost: 1 = a few bit operations on boards already built, 2 = attack maps,
+# SEE or legal-move generation, 3 = builds a whole explanation. A rule that
+# returns True has decided the message (say, a missed mate); after that the
+# rules costing SHORT_CIRCUIT_COST or more are skipped. Each rule's run time
+# goes to latency.LATENCY as "coach.rule.<name>".
+#
+#     @rule(priority=9, cost=1)
+#     def rook_lift(ctx):
+#         if ...:
+#             ctx.add(9, "Nice rook lift!")
+
+SHORT_CIRCUIT_COST = 2
+
+# Besides the position and the two moves, the tips depend on the drop and on
+# the game phase (board.ply()) only through the thresholds below: every drop
+# or ply threshold a rule tests must be an edge here, so that coach_cache can
+# key verdicts by bucket. Bump COACH_VERSION when a rule's output changes.
+DROP_EDGES = (10, 20, 50, 200, 600)         # drop >= edge
+PLY_EDGES  = (6, 7, 9, 11, 15, 21)          # ply >= edge
+COACH_VERSION = 2
+
+CoachRule = namedtuple("CoachRule", "name priority cost order func")
+RULES = []          # sorted by priority, then registration order
+
+
+def rule(priority: int, cost: int = 1, name: str = None):
+    """Decorator registering a coach rule (see above)."""
+    def register(func):
+        RULES.append(CoachRule(name or func.__name__, priority, cost, len(RULES), func))
+        RULES.sort(key=lambda r: (r.priority, r.order))
+        return func
+    return register
+
+
+class MoveContext:
+    """
+    Everything the rules know about one played move. The boards after the
+    move and after the engine's best move and their PositionAnalysis are
+    built on first use, so rules that are skipped don't pay for them.
+    """
+
+    def __init__(self, move: chess.Move, board: chess.Board, drop: float, best: chess.Move):
+        self.move  = move
+        self.board = board
+        self.drop  = drop
+        self.best  = best
+        self.best_legal  = best is not None and best in board.legal_moves
+        self.piece_moved = board.piece_at(move.from_square)
+        self.move_count  = board.ply()
+        self.board_after = board.copy(stack=False)
+        self.board_after.push(move)
+        self.moved_piece = self.board_after.piece_at(move.to_square)
+        self.white_after = self.board_after.occupied_co[chess.WHITE]
+        self.back_minors = ((self.board_after.knights | self.board_after.bishops)
+                            & self.white_after & chess.BB_RANK_1)
+        self.tips  = []             # (priority, rule order, text)
+        self.order = 0              # registration order of the rule running now
+        self._board_after_best = None
+        self._before = self._after = self._after_best = None
+
+    def add(self, priority: int, text: str):
+        self.tips.append((priority, self.order, text))
+
+    @property
+    def board_after_best(self) -> chess.Board:
+        """The board after the engine's best move (only when best_legal)."""
+        if self._board_after_best is None:
+            self._board_after_best = self.board.copy(stack=False)
+            self._board_after_best.push(self.best)
+        return self._board_after_best
+
+    @property
+    def before(self) -> PositionAnalysis:
+        if self._before is None:
+            self._before = PositionAnalysis(self.board)
+        return self._before
+
+    @property
+    def after(self) -> PositionAnalysis:
+        if self._after is None:
+            self._after = PositionAnalysis(self.board_after)
+        return self._after
+
+    @property
+    def after_best(self) -> PositionAnalysis:
+        if self._after_best is None:
+            self._after_best = PositionAnalysis(self.board_after_best)
+        return self._after_best
+
+    def best_piece_name(self) -> str:
+        best_piece = self.board.piece_at(self.best.from_square)
+        return PIECE_NAME.get(best_piece.piece_type, "piece") if best_piece else "piece"
+
+
+def verdict_key(move: chess.Move, board: chess.Board, drop: float, best: chess.Move) -> tuple:
+    """What explain_move's answer depends on: (zobrist, move, best, drop bucket, ply bucket)."""
+    return (chess.polyglot.zobrist_hash(board), move.uci(), best.uci() if best else "",
+            bisect.bisect_right(DROP_EDGES, drop), bisect.bisect_right(PLY_EDGES, board.ply()))
+
+
+def explain_move(move: chess.Move, board: chess.Board,
+                 drop: float, best: chess.Move) -> list:
+    """
+    Generate ALL coaching tips for a move, sorted by importance.
+    """
+    ctx = MoveContext(move, board, drop, best)
+    decided = False
+    for r in RULES:
+        if decided and r.cost >= SHORT_CIRCUIT_COST:
+            continue
+        ctx.order = r.order
+        t0 = time.perf_counter()
+        decided = r.func(ctx) is True or decided
+        LATENCY.record(f"coach.rule.{r.name}", time.perf_counter() - t0)
+
+    # SORT BY PRIORITY (ties: rule order) and return messages only
+    ctx.tips.sort(key=lambda tip: tip[:2])
+    return [text for _, _, text in ctx.tips]
+
+
+# ───────────────────────────────────────────────────────────────
+# 1. Hung a piece (the exchange on its new square loses material)
+# ───────────────────────────────────────────────────────────────
+@rule(priority=1, cost=2)
+def hung_piece(ctx):
+    move, moved_piece = ctx.move, ctx.moved_piece
+    if moved_piece and moved_piece.color == chess.WHITE:
+        if ctx.after.attacked(chess.BLACK, move.to_square):
+            loss = see_square(ctx.board_after, move.to_square, chess.BLACK)
+            pname = PIECE_NAME.get(moved_piece.piece_type, "piece")
+            sq_name = chess.square_name(move.to_square)
+            if loss and not ctx.after.attacked(chess.WHITE, move.to_square):
+                ctx.add(1, f"⚠ Your {pname} on {sq_name} is undefended — the opponent can take it!")
+            elif loss:
+                ctx.add(1, f"⚠ Your {pname} on {sq_name} is not defended enough — "
+                           f"the exchange there loses you {loss} points!")
+
+
+# ───────────────────────────────────────────────────────────────
+# 2. Left another piece hanging (it had a defender and was safe)
+# ───────────────────────────────────────────────────────────────
+@rule(priority=2, cost=2)
+def left_hanging(ctx):
+    if not ctx.piece_moved:
+        return
+    board, board_after, after = ctx.board, ctx.board_after, ctx.after
+    exposed = (board.occupied_co[chess.WHITE] & ~chess.BB_SQUARES[ctx.move.from_square]
+               & ctx.before.attacks[chess.WHITE] & after.attacks[chess.BLACK])
+    for sq in chess.scan_forward(exposed):
+        if see_square(board_after, sq, chess.BLACK) and not see_square(board, sq, chess.BLACK):
+            pname = PIECE_NAME.get(board.piece_type_at(sq), "piece")
+            if not after.attacked(chess.WHITE, sq):
+                ctx.add(2, f"⚠ Moving away left your {pname} on {chess.square_name(sq)} undefended!")
+            else:
+                ctx.add(2, f"⚠ Moving away took a defender from your {pname} on "
+                           f"{chess.square_name(sq)} — it can now be won in an exchange!")
+            break
+
+
+# ───────────────────────────────────────────────────────────────
+# 3. Missed free capture (or one that wins the exchange)
+# ───────────────────────────────────────────────────────────────
+@rule(priority=3, cost=2)
+def missed_capture(ctx):
+    board, best = ctx.board, ctx.best
+    if ctx.best_legal and board.is_capture(best) and not board.is_capture(ctx.move):
+        captured = board.piece_at(best.to_square)
+        gain = see(board, best) if captured else 0
+        if gain > 0:
+            cap_pname = PIECE_NAME.get(captured.piece_type, "piece")
+            prefix = (f"💰 Your {ctx.best_piece_name()} on {chess.square_name(best.from_square)} could have captured "
+                      f"the opponent's {cap_pname} on {chess.square_name(best.to_square)}")
+            if gain >= SEE_VALUE[captured.piece_type]:
+                ctx.add(3, f"{prefix} for free!")
+            else:
+                ctx.add(3, f"{prefix}, winning {gain} points in the exchange!")
+
+
+# ───────────────────────────────────────────────────────────────
+# 4. Missed check
+# ───────────────────────────────────────────────────────────────
+@rule(priority=4, cost=1)
+def missed_check(ctx):
+    if ctx.best_legal:
+        if ctx.board_after_best.is_check() and not ctx.board_after.is_check():
+            best = ctx.best
+            ctx.add(4, f"🎯 Your {ctx.best_piece_name()} on {chess.square_name(best.from_square)} could have moved to "
+                       f"{chess.square_name(best.to_square)} and put the King in check!")
+
+
+# ───────────────────────────────────────────────────────────────
+# 5. Missed checkmate — decides the message on its own
+# ───────────────────────────────────────────────────────────────
+@rule(priority=0, cost=2)
+def missed_checkmate(ctx):
+    if ctx.best_legal:
+        if ctx.board_after_best.is_checkmate():
+            ctx.add(0,
+                    f"👑 You missed CHECKMATE! {ctx.best_piece_name()} to {chess.square_name(ctx.best.to_square)} was the winning move!")
+            return True
+
+
+# ───────────────────────────────────────────────────────────────
+# 6. Suggest better move (with explanation)
+# ───────────────────────────────────────────────────────────────
+@rule(priority=5, cost=3)
+def better_move(ctx):
+    board, best = ctx.board, ctx.best
+    if ctx.best_legal and best != ctx.move and ctx.drop >= 10:
+        best_piece = board.piece_at(best.from_square)
+        my_piece = ctx.piece_moved
+        reason = why_better(best, best_piece, board, ctx.board_after,
+                            before=ctx.before, after_best=ctx.after_best)
+
+        if best_piece and my_piece and best_piece.piece_type != my_piece.piece_type:
+            bp_name = PIECE_NAME.get(best_piece.piece_type, "piece")
+            my_name = PIECE_NAME.get(my_piece.piece_type, "piece")
+            to_sq = chess.square_name(best.to_square)
+            from_sq = chess.square_name(best.from_square)
+            ctx.add(5, f"💡 Instead of the {my_name}, consider moving your {bp_name} "
+                       f"from {from_sq} to {to_sq}. {reason}")
+        else:
+            bp_name = PIECE_NAME.get(best_piece.piece_type, "piece")
+            to_sq = chess.square_name(best.to_square)
+            ctx.add(5, f"💡 The {bp_name} was right but {to_sq} is a stronger square. {reason}")
+
+
+# ───────────────────────────────────────────────────────────────
+# 7. King safety: moved king early
+# ───────────────────────────────────────────────────────────────
+@rule(priority=6, cost=1)
+def early_king(ctx):
+    if ctx.piece_moved and ctx.piece_moved.piece_type == chess.KING:
+        if ctx.board.has_castling_rights(chess.WHITE):
+            ctx.add(6, "🏰 Moving your King early loses castling rights — try to castle first to stay safe!")
+
+
+# ───────────────────────────────────────────────────────────────
+# 8. Pawn structure: doubled pawns
+# ───────────────────────────────────────────────────────────────
+@rule(priority=7, cost=1)
+def doubled_pawns(ctx):
+    if ctx.piece_moved and ctx.piece_moved.piece_type == chess.PAWN:
+        col = chess.square_file(ctx.move.to_square)
+        pawns_on_col = chess.popcount(ctx.board_after.pieces_mask(chess.PAWN, chess.WHITE)
+                                      & chess.BB_FILES[col])
+        if pawns_on_col >= 2:
+            ctx.add(7, "📌 You now have doubled pawns — they can be hard to defend.")
+
+
+# ───────────────────────────────────────────────────────────────
+# 9. Opening: early queen
+# ───────────────────────────────────────────────────────────────
+@rule(priority=8, cost=1)
+def early_queen(ctx):
+    if ctx.move_count <= 14 and ctx.piece_moved:
+        if ctx.piece_moved.piece_type == chess.QUEEN and ctx.move_count < 6:
+            if ctx.back_minors:
+                first = PIECE_NAME.get(ctx.board_after.piece_type_at(chess.lsb(ctx.back_minors)), "piece")
+                ctx.add(8, f"⚠ Bringing your Queen out early is risky — develop your {first} first!")
+
+
+# ───────────────────────────────────────────────────────────────
+# 10. Positive: good development
+# ───────────────────────────────────────────────────────────────
+@rule(priority=20, cost=1)
+def development(ctx):
+    move, piece_moved = ctx.move, ctx.piece_moved
+    if ctx.move_count <= 10 and piece_moved:
+        if piece_moved.piece_type in (chess.KNIGHT, chess.BISHOP):
+            ctx.add(20, "👌 Good — developing your pieces early is the right idea!")
+        elif piece_moved.piece_type == chess.PAWN:
+            from_rank = chess.square_rank(move.from_square)
+            if from_rank == 1 and chess.square_rank(move.to_square) == 3 and ctx.drop < 20:
+                ctx.add(20, "👌 Good central pawn push — controlling the centre!")
+
+
+# ───────────────────────────────────────────────────────────────
+# 11. Positive: good capture
+# ───────────────────────────────────────────────────────────────
+@rule(priority=21, cost=2)
+def good_capture(ctx):
+    board, move = ctx.board, ctx.move
+    if board.is_capture(move) and ctx.drop < 10:
+        if board.piece_at(move.to_square) and see(board, move) >= 0:
+            ctx.add(21, "💥 Nice capture! You traded well.")
+
+
+# ───────────────────────────────────────────────────────────────
+# 12. Positive: castling
+# ───────────────────────────────────────────────────────────────
+@rule(priority=22, cost=1)
+def castling(ctx):
+    if ctx.board.is_castling(ctx.move):
+        ctx.add(22, "🏰 Great — castling keeps your King safe and connects your Rooks!")
+
+
+# ───────────────────────────────────────────────────────────────
+# 13–19. EXTRA COACHING LAYERS (all 8 upgrades)
+# ───────────────────────────────────────────────────────────────
+
+# 13. Blunder severity
+@rule(priority=1, cost=1)
+def severity(ctx):
+    drop = ctx.drop
+    if drop >= 600:
+        ctx.add(1, "This move is a serious blunder — it heavily worsens your position.")
+    elif drop >= 200:
+        ctx.add(4, "This move is a mistake — it weakens your position.")
+    elif drop >= 50:
+        ctx.add(10, "This move is a small inaccuracy — there was a more precise option.")
+
+
+# 14. Threat detection
+@rule(priority=3, cost=2)
+def new_threat(ctx):
+    new_threats = ctx.white_after & ctx.after.attacks[chess.BLACK] & ~ctx.before.attacks[chess.BLACK]
+    if new_threats:
+        sq = chess.lsb(new_threats)
+        pname = PIECE_NAME.get(ctx.board_after.piece_type_at(sq), "piece")
+        ctx.add(3, f"⚠ After this move, your {pname} on {chess.square_name(sq)} is now under attack.")
+
+
+# 15. Strategic plan suggestions
+@rule(priority=12, cost=1)
+def castle_soon(ctx):
+    white_king_sq = ctx.board_after.king(chess.WHITE)
+    if white_king_sq is not None and chess.square_rank(white_king_sq) == 0 and ctx.move_count > 8:
+        ctx.add(12, "Try to castle soon — keeping your King in the center too long is risky.")
+
+
+# undeveloped minor pieces (named from the h-side, like piece_map order)
+@rule(priority=13, cost=1)
+def undeveloped(ctx):
+    if ctx.back_minors and ctx.move_count <= 20:
+        last = PIECE_NAME.get(ctx.board_after.piece_type_at(chess.msb(ctx.back_minors)), "piece")
+        ctx.add(13, f"Consider developing your remaining {last} — get all your pieces active.")
+
+
+# 16. Positional concepts
+# Knight outpost
+@rule(priority=14, cost=1)
+def knight_outpost(ctx):
+    if ctx.board_after.knights & ctx.white_after & (chess.BB_RANK_4 | chess.BB_RANK_5):
+        ctx.add(14, "Nice — your knight is on a strong outpost, hard to challenge.")
+
+
+# Bad bishop — only if own pawns block its diagonals
+@rule(priority=15, cost=1)
+def bad_bishop(ctx):
+    white_bishops = ctx.board_after.bishops & ctx.white_after
+    if white_bishops:
+        # A bishop on an open diagonal attacks 7-13 squares; if very few, it's blocked
+        if chess.popcount(ctx.board_after.attacks_mask(chess.msb(white_bishops))) <= 3:
+            ctx.add(15, "Your bishop is blocked by your own pawns — consider opening the diagonal.")
+
+
+# 17. Opening principles
+@rule(priority=16, cost=1)
+def opening_principles(ctx):
+    if ctx.move_count <= 14:
+        if chess.popcount(ctx.back_minors) >= 2 and ctx.move_count > 6:
+            ctx.add(16, "Try not to move the same piece twice early — develop all your pieces first.")
+
+
+# 18. Endgame coaching
+@rule(priority=17, cost=1)
+def endgame_king(ctx):
+    if not ctx.board_after.queens:
+        ksq = ctx.board_after.king(chess.WHITE)
+        if ksq and chess.square_rank(ksq) <= 1:
+            ctx.add(17, "In the endgame, activate your King — it becomes a strong piece.")
+
+
+# 19. Move category label (fallback) — last, when no other rule had anything to say
+@rule(priority=30, cost=1)
+def quiet_move(ctx):
+    if ctx.piece_moved and not ctx.tips:
+        ctx.add(30, "This is a quiet improving move — it slightly improves your position.")
+
+
+def why_better(best: chess.Move, best_piece, board: chess.Board,
+               board_after: chess.Board, before: PositionAnalysis = None,
+               after_best: PositionAnalysis = None) -> str:
+    """
+    Return a detailed plain-English reason why the best move is better.
+    before / after_best are the analyses of board and of board after best,
+    when the caller (explain_move) already has them.
+    """
+    to_sq    = best.to_square
+    from_sq  = best.from_square
+    to_file  = chess.square_file(to_sq)
+    to_rank  = chess.square_rank(to_sq)
+    to_name  = chess.square_name(to_sq)
+    bp_name  = PIECE_NAME.get(best_piece.piece_type, "piece")
+    move_num = board.ply()
+
+    central      = {chess.D4, chess.D5, chess.E4, chess.E5}
+    near_centre  = {chess.C3,chess.C4,chess.C5,chess.C6,
+                    chess.D3,chess.D6,chess.E3,chess.E6,
+                    chess.F3,chess.F4,chess.F5,chess.F6}
+
+    if before is None:
+        before = PositionAnalysis(board)
+    if after_best is None:
+        board_after_best = board.copy(stack=False)
+        board_after_best.push(best)
+        after_best = PositionAnalysis(board_after_best)
+    board_after_best = after_best.board
+
+    reasons = []
+
+    # ── Checkmate ─────────────────────────────────────────────────────────
+    if board_after_best.is_checkmate():
+        return f"That move is CHECKMATE — the game would be over immediately! Always look for the King hunt!"
+
+    # ── Check ─────────────────────────────────────────────────────────────
+    if board_after_best.is_check():
+        reasons.append(f"it puts the opponent's King in check, forcing them to deal with the threat instead of developing their own attack")
+
+    # ── Capture ───────────────────────────────────────────────────────────
+    captured = board.piece_at(to_sq)
+    if captured:
+        cap_name = PIECE_NAME.get(captured.piece_type, "piece")
+        gain     = see(board, best)
+        if gain > 0 and gain >= SEE_VALUE[captured.piece_type]:
+            reasons.append(f"it captures the opponent's {cap_name} for free — you gain {gain} points of material advantage")
+        elif gain > 0:
+            reasons.append(f"it wins the exchange on {to_name} — you come out {gain} points ahead")
+        elif gain == 0:
+            reasons.append(f"it captures the opponent's {cap_name} in an even exchange — keeping material balanced")
+        else:
+            reasons.append(f"it captures a piece, removing it from the board")
+
+    # ── Fork (attacks two pieces at once) ────────────────────────────────
+    black_attacked = board_after_best.occupied_co[chess.BLACK] & after_best.attacks[chess.WHITE]
+    attacked_pieces = [PIECE_NAME.get(board_after_best.piece_type_at(sq), "piece")
+                       for sq in chess.scan_forward(black_attacked & ~board_after_best.kings)]
+    if len(attacked_pieces) >= 2:
+        reasons.append(f"it forks the opponent — attacking their {attacked_pieces[0]} and {attacked_pieces[1]} at the same time, and they can only save one!")
+
+    # ── Attacks a valuable undefended piece ───────────────────────────────
+    elif attacked_pieces:
+        sq = chess.lsb(black_attacked)
+        ptype  = board_after_best.piece_type_at(sq)
+        pname  = PIECE_NAME.get(ptype, "piece")
+        pval   = PIECE_VALUE.get(ptype, 0)
+        mv_val = PIECE_VALUE.get(best_piece.piece_type, 0)
+        if not after_best.attacked(chess.BLACK, sq):
+            reasons.append(f"it attacks the opponent's undefended {pname} on {chess.square_name(sq)} — they must move it or lose it")
+        elif pval > mv_val:
+            reasons.append(f"it threatens to win the opponent's {pname} on {chess.square_name(sq)} which is worth more than your {bp_name}")
+
+    # ── Central control ───────────────────────────────────────────────────
+    if to_sq in central:
+        reasons.append(f"placing your {bp_name} on {to_name} gives it maximum reach — central pieces control the most squares and influence both sides of the board")
+    elif to_sq in near_centre and best_piece.piece_type in (chess.KNIGHT, chess.BISHOP):
+        reasons.append(f"{to_name} is a strong outpost near the centre, giving your {bp_name} excellent influence over the key squares")
+
+    # ── Development (opening principles) ─────────────────────────────────
+    if move_num <= 14 and chess.square_rank(from_sq) == 0:
+        if best_piece.piece_type == chess.KNIGHT:
+            squares_controlled = chess.popcount(after_best.reach(to_sq))
+            reasons.append(f"it develops your Knight which now controls {squares_controlled} squares — in the opening, get your pieces off the back rank as quickly as possible")
+        elif best_piece.piece_type == chess.BISHOP:
+            diagonal_len = chess.popcount(after_best.reach(to_sq))
+            reasons.append(f"it activates your Bishop with a diagonal controlling {diagonal_len} squares — Bishops become much stronger when they have open diagonals")
+
+    # ── King safety ───────────────────────────────────────────────────────
+    if best_piece.piece_type == chess.KING and board.is_castling(best):
+        reasons.append("castling tucks your King safely behind your pawns and connects your Rooks — two important goals in one move!")
+
+    # ── Rook on open file ─────────────────────────────────────────────────
+    if best_piece.piece_type == chess.ROOK:
+        if not board_after_best.pawns & chess.BB_FILES[to_file]:
+            reasons.append(f"it places your Rook on an open file with no pawns blocking it — Rooks are most powerful on open files where they can attack freely")
+
+    # ── Piece activity comparison ─────────────────────────────────────────
+    if not reasons:
+        my_squares_before = chess.popcount(before.reach(from_sq))
+        my_squares_after  = chess.popcount(after_best.reach(to_sq))
+        if my_squares_after > my_squares_before:
+            diff = my_squares_after - my_squares_before
+            reasons.append(f"your {bp_name} controls {diff} more squares from {to_name} than where it was — more active pieces give you more options every turn")
+        elif best_piece.piece_type == chess.QUEEN:
+            reasons.append(f"the Queen is more centralised and harder to attack from {to_name}")
+        else:
+            reasons.append(f"your {bp_name} is simply more active and better placed on {to_name}")
+
+    if reasons:
+        if len(reasons) == 1:
+            return f"Because {reasons[0]}."
+        else:
+            return f"Because {reasons[0]}, and also {reasons[1]}."
+
+    return "It gives your piece a more active and influential role in the position."
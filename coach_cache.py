@@ -0,0 +1,121 @@
+"""
+coach_cache.py
+==============
+Memo of the coach's verdicts (coach.explain_move tip lists).
+
+The same opening positions and the same mistakes come up game after game,
+so the tips for (position, played move, engine best move, drop bucket,
+game-phase bucket) are kept in a bounded in-memory LRU, optionally backed
+by an SQLite file so they survive restarts. See coach.verdict_key for why
+the drop and the ply can be bucketed without changing any tip.
+
+Usage:
+    cache = CoachCache("coach_cache.sqlite")      # or CoachCache() for memory only
+    tips  = cache.explain_move(move, board_before, drop, best)
+    cache.hits, cache.misses
+"""
+
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import chess
+
+from coach import COACH_VERSION, explain_move, verdict_key
+
+
+class CoachCache:
+    """LRU (+ optional SQLite) cache of explain_move results."""
+
+    def __init__(self, path: str = None, capacity: int = 2048):
+        self.capacity = capacity
+        self.hits     = 0
+        self.misses   = 0
+        self._lru     = OrderedDict()
+        self._lock    = threading.Lock()
+        self._db      = None
+        if path is None:
+            return
+        try:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS verdicts ("
+                " version INTEGER NOT NULL, pos INTEGER NOT NULL,"
+                " move TEXT NOT NULL, best TEXT NOT NULL,"
+                " drop_bucket INTEGER NOT NULL, ply_bucket INTEGER NOT NULL,"
+                " tips TEXT NOT NULL,"
+                " PRIMARY KEY (version, pos, move, best, drop_bucket, ply_bucket))")
+            # verdicts of older coach versions would never be read again
+            self._db.execute("DELETE FROM verdicts WHERE version != ?", (COACH_VERSION,))
+            self._db.commit()
+        except sqlite3.Error as e:
+            print(f"[CoachCache] disk cache disabled: {e}")
+            self._db = None
+
+    @staticmethod
+    def _row_key(key: tuple) -> tuple:
+        # SQLite integers are signed 64-bit
+        pos = key[0] - (1 << 64) if key[0] >= (1 << 63) else key[0]
+        return (COACH_VERSION, pos) + key[1:]
+
+    def get(self, move: chess.Move, board: chess.Board, drop: float, best: chess.Move):
+        """Cached tip list or None."""
+        key = verdict_key(move, board, drop, best)
+        with self._lock:
+            tips = self._lru.get(key)
+            if tips is not None:
+                self._lru.move_to_end(key)
+            elif self._db is not None:
+                row = self._db.execute(
+                    "SELECT tips FROM verdicts WHERE version=? AND pos=? AND move=? AND best=?"
+                    " AND drop_bucket=? AND ply_bucket=?", self._row_key(key)).fetchone()
+                if row is not None:
+                    tips = json.loads(row[0])
+                    self._remember(key, tips)
+            if tips is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return list(tips)
+
+    def put(self, move: chess.Move, board: chess.Board, drop: float, best: chess.Move,
+            tips: list):
+        key = verdict_key(move, board, drop, best)
+        with self._lock:
+            self._remember(key, list(tips))
+            if self._db is not None:
+                try:
+                    self._db.execute("INSERT OR REPLACE INTO verdicts VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                     self._row_key(key) + (json.dumps(tips),))
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    print(f"[CoachCache] write failed: {e}")
+
+    def _remember(self, key, tips):
+        self._lru[key] = tips
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.capacity:
+            self._lru.popitem(last=False)
+
+    def explain_move(self, move: chess.Move, board: chess.Board, drop: float,
+                     best: chess.Move) -> list:
+        """coach.explain_move, answered from the cache when possible."""
+        tips = self.get(move, board, drop, best)
+        if tips is None:
+            tips = explain_move(move, board, drop, best)
+            self.put(move, board, drop, best, tips)
+        return tips
+
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        rate = 100.0 * self.hits / total if total else 0.0
+        return f"coach cache: {self.hits} hits / {self.misses} misses ({rate:.0f}% hit)"
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
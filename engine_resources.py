@@ -0,0 +1,115 @@
+"""
+engine_resources.py
+===================
+Pick Stockfish's Threads and Hash options from the host hardware.
+
+The core count comes from the process's CPU affinity (os.cpu_count() as a
+fallback), available memory from GlobalMemoryStatusEx on Windows and
+sysconf on POSIX. One core is left for the GUI, the rest are shared out
+between the engines of the pool, and each engine gets a power-of-two
+share of HASH_FRACTION of the free memory.
+
+The chosen values are written to engine_settings.json together with what
+was detected. Set "auto": false in that file to pin your own Threads/Hash;
+they are then used as they are.
+
+Usage:
+    options = engine_resources(pool_size=2)     # {"Threads": 3, "Hash": 256}
+"""
+
+import ctypes
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+ENGINE_SETTINGS_FILE = Path("engine_settings.json")
+HASH_FRACTION = 0.25      # share of free memory all engines may use together
+MIN_HASH_MB   = 16        # Stockfish's default
+MAX_HASH_MB   = 2048      # more doesn't help at the GUI's search times
+
+
+def cpu_cores() -> int:
+    """Cores this process may run on."""
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except (AttributeError, OSError):
+        return max(1, os.cpu_count() or 1)
+
+
+def available_memory_mb():
+    """Free physical memory in MB, or None if it can't be read."""
+    if sys.platform == "win32":
+        class MEMORYSTATUSEX(ctypes.Structure):
+            _fields_ = [("dwLength", ctypes.c_ulong),
+                        ("dwMemoryLoad", ctypes.c_ulong),
+                        ("ullTotalPhys", ctypes.c_ulonglong),
+                        ("ullAvailPhys", ctypes.c_ulonglong),
+                        ("ullTotalPageFile", ctypes.c_ulonglong),
+                        ("ullAvailPageFile", ctypes.c_ulonglong),
+                        ("ullTotalVirtual", ctypes.c_ulonglong),
+                        ("ullAvailVirtual", ctypes.c_ulonglong),
+                        ("ullAvailExtendedVirtual", ctypes.c_ulonglong)]
+        status = MEMORYSTATUSEX()
+        status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+        if not ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return None
+        return status.ullAvailPhys // (1024 * 1024)
+    try:
+        page = os.sysconf("SC_PAGE_SIZE")
+        try:
+            pages = os.sysconf("SC_AVPHYS_PAGES")
+        except (ValueError, OSError):
+            pages = os.sysconf("SC_PHYS_PAGES") // 2   # macOS: no "available" counter
+        return page * pages // (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def _pow2_floor(n: int) -> int:
+    p = 1
+    while p * 2 <= n:
+        p *= 2
+    return p
+
+
+def recommend(cores: int, memory_mb, pool_size: int = 1) -> dict:
+    """{"Threads", "Hash"} for each of pool_size engines."""
+    pool_size = max(1, pool_size)
+    threads = max(1, (cores - 1) // pool_size)
+    if memory_mb is None:
+        hash_mb = MIN_HASH_MB
+    else:
+        share = int(memory_mb * HASH_FRACTION) // pool_size
+        hash_mb = min(MAX_HASH_MB, max(MIN_HASH_MB, _pow2_floor(max(1, share))))
+    return {"Threads": threads, "Hash": hash_mb}
+
+
+def engine_resources(pool_size: int = 1, path: Path = ENGINE_SETTINGS_FILE) -> dict:
+    """
+    UCI options for each engine of the pool. Detects and records them in
+    path, unless that file says "auto": false — then its values are used.
+    """
+    path = Path(path)
+    saved = {}
+    if path.exists():
+        try:
+            with open(path, encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[engine_resources] ignoring {path}: {e}")
+    if saved.get("auto") is False and "Threads" in saved and "Hash" in saved:
+        return {"Threads": int(saved["Threads"]), "Hash": int(saved["Hash"])}
+
+    cores, memory_mb = cpu_cores(), available_memory_mb()
+    options = recommend(cores, memory_mb, pool_size)
+    record = {"auto": True, **options, "pool_size": pool_size,
+              "cpu_cores": cores, "available_mb": memory_mb,
+              "detected": time.strftime("%Y-%m-%d %H:%M:%S")}
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(record, f, indent=2)
+    except OSError as e:
+        print(f"[engine_resources] could not save {path}: {e}")
+    return options
@@ -0,0 +1,232 @@
+"""
+engine_service.py
+=================
+asyncio driver for a small pool of UCI engines, for use from a Tk (or any
+other) GUI.
+
+EngineService starts `size` engine processes with chess.engine.popen_uci on
+a private event loop running in one background thread. Each engine is a
+slot with its own options, so the opponent can play at a low Skill Level in
+slot 0 while the coach analyses at full strength in slot 1, and both
+searches run at the same time. The GUI thread hands it
+coroutines with submit(); each runs as a task on that loop and its outcome
+is put on a single thread-safe queue as an EngineResult. The loop thread
+never calls into the GUI: Tk is not thread-safe, so the GUI drains the
+queue from its own thread (root.after polling). run() blocks until a
+coroutine finishes, for startup and scripts; the GUI thread must not use it
+once the game is on.
+
+Every task is tagged with a generation number (the GUI's move counter).
+cancel(gen) cancels the tasks of older generations; python-chess sends
+"stop" to the engine when a pending play/analyse is cancelled, so an undo
+doesn't have to wait for a search nobody wants any more. Commands to the
+same slot are serialized with a lock: python-chess would otherwise cancel
+the running command whenever a new one is sent.
+
+With a latency.LatencyRecorder (latency=...) every engine round trip is
+timed: engine.play / engine.analyse / engine.configure while the slot's
+lock is held, engine.lock_wait for the time spent queueing for it and
+engine.cache_hit for analyses answered from the eval cache.
+
+Usage:
+    results = queue.Queue()
+    service = EngineService("stockfish.exe", {"Skill Level": 5}, size=2,
+                            cache=EvalCache(), results=results)
+    service.run(service.configure({"Skill Level": 20}, slot=1))
+    service.submit("move", move_counter, service.play(board, Limit(time=0.6), slot=0))
+    service.submit("ponder", None, service.start_analysis(board, slot=1))
+    ...
+    msg = results.get_nowait()      # EngineResult(kind, gen, value, error), from root.after
+"""
+
+import asyncio
+import queue
+import sys
+import threading
+import time
+from collections import namedtuple
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import chess
+import chess.engine
+
+EngineResult = namedtuple("EngineResult", "kind gen value error")
+
+
+def engine_command(path):
+    """Command line for an engine path; .py engines (fake_uci.py) run with this Python."""
+    path = Path(path)
+    if path.suffix == ".py":
+        return [sys.executable, str(path)]
+    return str(path)
+
+
+class EngineService:
+    """A pool of UCI engines on one asyncio loop thread."""
+
+    def __init__(self, command, options: dict = None, cache=None,
+                 results: queue.Queue = None, size: int = 1,
+                 latency=None):
+        self.command  = command
+        self.size     = max(1, size)
+        self.options  = [dict(options or {}) for _ in range(self.size)]
+        self.cache    = cache                  # EvalCache or None
+        self.results  = results if results is not None else queue.Queue()
+        self.latency  = latency                # LatencyRecorder or None
+        self.engines  = []
+        self._locks   = []                     # asyncio.Lock per slot, made on the loop
+        self._tasks   = {}                     # asyncio.Task -> generation
+        self._analyses = set()                 # started and not stopped yet
+        self._loop    = asyncio.new_event_loop()
+        self._thread  = threading.Thread(target=self._run_loop, daemon=True,
+                                         name="engine-service")
+        self._thread.start()
+        try:
+            self.run(self._open(), timeout=30)
+        except Exception:
+            self._shutdown_loop()
+            raise
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    async def _open(self):
+        self._locks = [asyncio.Lock() for _ in range(self.size)]
+        opened = await asyncio.gather(
+            *(chess.engine.popen_uci(self.command) for _ in range(self.size)),
+            return_exceptions=True)
+        self.engines = [p[1] for p in opened if not isinstance(p, BaseException)]
+        for p in opened:
+            if isinstance(p, BaseException):
+                await self._quit_all()
+                raise p
+        for engine, options in zip(self.engines, self.options):
+            if options:
+                await engine.configure(options)
+
+    # ── calling into the loop ─────────────────────────────────────────────────
+    def run(self, coro, timeout: float = None):
+        """Run coro on the engine loop and block until it finishes."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    def submit(self, kind: str, gen: int, coro):
+        """
+        Schedule coro as a task tagged (kind, gen). Its result or exception
+        goes to self.results; cancelled tasks report nothing. gen=None means
+        the task is never cancelled by cancel(gen).
+        """
+        def _start():
+            task = self._loop.create_task(coro)
+            self._tasks[task] = gen
+            task.add_done_callback(lambda t: self._finished(kind, t))
+        self._loop.call_soon_threadsafe(_start)
+
+    def _finished(self, kind: str, task: asyncio.Task):
+        gen = self._tasks.pop(task, None)
+        if task.cancelled():
+            return
+        error = task.exception()
+        value = None if error is not None else task.result()
+        self.results.put(EngineResult(kind, gen, value, error))
+
+    def cancel(self, current_gen: int = None):
+        """Cancel tasks older than current_gen (all tasks if it's None)."""
+        def _cancel():
+            for task, gen in list(self._tasks.items()):
+                if current_gen is None or (gen is not None and gen < current_gen):
+                    task.cancel()
+        self._loop.call_soon_threadsafe(_cancel)
+
+    # ── engine coroutines (run on the loop) ──────────────────────────────────
+    @asynccontextmanager
+    async def _slot(self, slot: int, metric: str):
+        """Hold the slot's lock; with a latency recorder, time the wait and the call."""
+        if self.latency is None:
+            async with self._locks[slot]:
+                yield
+            return
+        t0 = time.perf_counter()
+        async with self._locks[slot]:
+            t1 = time.perf_counter()
+            self.latency.record("engine.lock_wait", t1 - t0)
+            try:
+                yield
+            finally:
+                self.latency.record(metric, time.perf_counter() - t1)
+
+    async def play(self, board: chess.Board, limit: chess.engine.Limit,
+                   slot: int = 0, **kwargs):
+        async with self._slot(slot, "engine.play"):
+            return await self.engines[slot].play(board, limit, **kwargs)
+
+    async def analyse(self, board: chess.Board, limit: chess.engine.Limit,
+                      tag: str = "", slot: int = 0, **kwargs) -> dict:
+        """engine.analyse, answered from the eval cache when possible."""
+        if self.cache is not None and not kwargs:
+            t0 = time.perf_counter()
+            info = self.cache.get(board, limit, tag)
+            if info is not None:
+                if self.latency is not None:
+                    self.latency.record("engine.cache_hit", time.perf_counter() - t0)
+                return info
+        async with self._slot(slot, "engine.analyse"):
+            info = await self.engines[slot].analyse(board, limit, **kwargs)
+        if self.cache is not None and not kwargs:
+            self.cache.put(board, limit, info, tag)
+        return info
+
+    async def configure(self, options: dict, slot: int = None):
+        """Set options on one slot, or on every engine when slot is None."""
+        slots = range(self.size) if slot is None else [slot]
+        for i in slots:
+            self.options[i].update(options)
+            async with self._slot(i, "engine.configure"):
+                await self.engines[i].configure(options)
+
+    async def start_analysis(self, board: chess.Board, slot: int = 0, **kwargs):
+        """Start an infinite analysis; returns the AnalysisResult handle."""
+        # The lock is only held while starting: the next command stops it.
+        async with self._locks[slot]:
+            analysis = await self.engines[slot].analysis(board, **kwargs)
+        self._analyses.add(analysis)
+        return analysis
+
+    async def stop_analysis(self, analysis) -> list:
+        """Stop an analysis started with start_analysis -> multipv info dicts."""
+        self._analyses.discard(analysis)
+        analysis.stop()
+        await analysis.wait()
+        return [dict(line) for line in analysis.multipv]
+
+    # ── shutdown ──────────────────────────────────────────────────────────────
+
+    def close(self):
+        if not self._loop.is_running():
+            return
+        self.cancel()
+        try:
+            self.run(self._quit_all(), timeout=5)
+        except Exception:
+            pass
+        self._shutdown_loop()
+
+    async def _quit_all(self):
+        # an analysis whose handle never reached its owner (closing while it
+        # was being started) is still running
+        for analysis in list(self._analyses):
+            try:
+                await self.stop_analysis(analysis)
+            except Exception:
+                pass
+        engines, self.engines = self.engines, []
+        for engine in engines:
+            try:
+                await engine.quit()
+            except Exception:
+                pass
+
+    def _shutdown_loop(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
@@ -0,0 +1,141 @@
+"""
+eval_cache.py
+=============
+Persistent cache of Stockfish analysis results.
+
+Entries are keyed by the position's polyglot Zobrist hash plus a string
+describing the search (limit and any engine options that change the
+result, e.g. Skill Level). Lookups go through an in-memory LRU first and
+fall back to an SQLite file, so opening positions analysed in earlier games
+come back instantly instead of costing another engine round trip.
+
+Usage:
+    cache = EvalCache("eval_cache.sqlite")
+    info  = cache.analyse(engine, board, chess.engine.Limit(depth=12), tag="skill=5")
+"""
+
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import chess
+import chess.engine
+import chess.polyglot
+
+
+def limit_key(limit: chess.engine.Limit, tag: str = "") -> str:
+    """Stable text form of a search limit (+ caller tag) for the cache key."""
+    parts = [f"{name}={getattr(limit, name)}"
+             for name in ("depth", "nodes", "time", "mate")
+             if getattr(limit, name, None) is not None]
+    if tag:
+        parts.append(tag)
+    return ";".join(parts)
+
+
+class EvalCache:
+    """LRU-fronted SQLite cache of {score, pv, depth} analysis results."""
+
+    def __init__(self, path: str = "eval_cache.sqlite", capacity: int = 4096):
+        self.capacity = capacity
+        self.hits     = 0
+        self.misses   = 0
+        self._lru     = OrderedDict()
+        self._lock    = threading.Lock()
+        self._db      = None
+        try:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS evals ("
+                " pos INTEGER NOT NULL, lim TEXT NOT NULL,"
+                " kind TEXT NOT NULL, value INTEGER NOT NULL,"
+                " pv TEXT NOT NULL, depth INTEGER,"
+                " PRIMARY KEY (pos, lim))")
+            self._db.commit()
+        except sqlite3.Error as e:
+            print(f"[EvalCache] disk cache disabled: {e}")
+            self._db = None
+
+    @staticmethod
+    def _pos_key(board: chess.Board) -> int:
+        # SQLite integers are signed 64-bit
+        h = chess.polyglot.zobrist_hash(board)
+        return h - (1 << 64) if h >= (1 << 63) else h
+
+    # ── raw get / put ─────────────────────────────────────────────────────────
+    def get(self, board: chess.Board, limit: chess.engine.Limit, tag: str = ""):
+        """Cached info dict ({"score", "pv", "depth"}) or None."""
+        key = (self._pos_key(board), limit_key(limit, tag))
+        with self._lock:
+            row = self._lru.get(key)
+            if row is not None:
+                self._lru.move_to_end(key)
+            elif self._db is not None:
+                row = self._db.execute(
+                    "SELECT kind, value, pv, depth FROM evals WHERE pos=? AND lim=?",
+                    key).fetchone()
+                if row is not None:
+                    self._remember(key, row)
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return self._to_info(board, row)
+
+    def put(self, board: chess.Board, limit: chess.engine.Limit, info: dict,
+            tag: str = ""):
+        score = info.get("score")
+        if score is None:
+            return
+        white = score.white()
+        if white.is_mate():
+            kind, value = "mate", white.mate()
+        else:
+            kind, value = "cp", white.score()
+        pv    = " ".join(m.uci() for m in info.get("pv", []))
+        row   = (kind, value, pv, info.get("depth"))
+        key   = (self._pos_key(board), limit_key(limit, tag))
+        with self._lock:
+            self._remember(key, row)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO evals VALUES (?, ?, ?, ?, ?, ?)",
+                        key + row)
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    print(f"[EvalCache] write failed: {e}")
+
+    def _remember(self, key, row):
+        self._lru[key] = row
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.capacity:
+            self._lru.popitem(last=False)
+
+    @staticmethod
+    def _to_info(board: chess.Board, row) -> dict:
+        kind, value, pv, depth = row
+        score = chess.engine.Mate(value) if kind == "mate" else chess.engine.Cp(value)
+        info = {"score": chess.engine.PovScore(score, chess.WHITE),
+                "pv": [chess.Move.from_uci(u) for u in pv.split()]}
+        if depth is not None:
+            info["depth"] = depth
+        return info
+
+    # ── engine wrapper ────────────────────────────────────────────────────────
+    def analyse(self, engine, board: chess.Board, limit: chess.engine.Limit,
+                tag: str = "") -> dict:
+        """engine.analyse(board, limit), answered from the cache when possible."""
+        info = self.get(board, limit, tag)
+        if info is None:
+            info = engine.analyse(board, limit)
+            self.put(board, limit, info, tag)
+        return info
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+fake_uci.py
+===========
+Deterministic stand-in for Stockfish that speaks enough UCI for the GUI,
+benchmarks and tools: no engine binary needed, same answers every run.
+
+Evaluation is material only (2-ply search), or scripted from a JSON file
+mapping FEN (first four fields) → {"score": cp, "bestmove": "e2e4"} for
+positions you want to pin. Each search waits a fixed latency first, so
+timings are repeatable.
+
+Usage:
+    python fake_uci.py [--latency 0.05] [--script evals.json]
+UCI options (setoption name ... value ...): Latency (ms), Script, MultiPV,
+plus Skill Level / Threads / Hash, which are accepted and ignored.
+"""
+
+import argparse
+import json
+import sys
+import threading
+
+import chess
+
+VALUES = {chess.PAWN: 100, chess.KNIGHT: 320, chess.BISHOP: 330,
+          chess.ROOK: 500, chess.QUEEN: 900, chess.KING: 0}
+MATE = 30000
+
+
+def material(board: chess.Board) -> int:
+    """Material balance in centipawns from the side to move's point of view."""
+    score = 0
+    for piece_type, value in VALUES.items():
+        score += value * (len(board.pieces(piece_type, board.turn))
+                          - len(board.pieces(piece_type, not board.turn)))
+    return score
+
+
+def _negamax(board: chess.Board, depth: int) -> int:
+    if board.is_checkmate():
+        return -MATE
+    if depth == 0 or board.is_game_over():
+        return material(board) if not board.is_game_over() else 0
+    best = -MATE - 1
+    for move in sorted(board.legal_moves, key=lambda m: m.uci()):
+        board.push(move)
+        best = max(best, -_negamax(board, depth - 1))
+        board.pop()
+    return best
+
+
+def rank_moves(board: chess.Board) -> list:
+    """[(score, move)] best first; ties broken by UCI string so results are stable."""
+    ranked = []
+    for move in board.legal_moves:
+        board.push(move)
+        ranked.append((-_negamax(board, 1), move))
+        board.pop()
+    ranked.sort(key=lambda sm: (-sm[0], sm[1].uci()))
+    return ranked
+
+
+class FakeEngine:
+    def __init__(self, latency: float, script: dict):
+        self.latency = latency
+        self.script  = script
+        self.multipv = 1
+        self.board   = chess.Board()
+        self.search  = None
+        self.stop_ev = threading.Event()
+        self.out_lock = threading.Lock()
+
+    def send(self, line: str):
+        with self.out_lock:
+            sys.stdout.write(line + "\n")
+            sys.stdout.flush()
+
+    # ── commands ─────────────────────────────────────────────────────────────
+    def cmd_uci(self, _):
+        self.send("id name FakeUCI")
+        self.send("id author Chess_Game")
+        self.send("option name Latency type spin default 50 min 0 max 60000")
+        self.send("option name Script type string default <empty>")
+        self.send("option name MultiPV type spin default 1 min 1 max 256")
+        self.send("option name Skill Level type spin default 20 min 0 max 20")
+        self.send("option name Threads type spin default 1 min 1 max 1024")
+        self.send("option name Hash type spin default 16 min 1 max 33554432")
+        self.send("option name Ponder type check default false")
+        self.send("uciok")
+
+    def cmd_isready(self, _):
+        self.send("readyok")
+
+    def cmd_setoption(self, args):
+        words = args.split()
+        if "name" not in words:
+            return
+        i = words.index("name")
+        j = words.index("value") if "value" in words else len(words)
+        name, value = " ".join(words[i + 1:j]).lower(), " ".join(words[j + 1:])
+        if name == "latency":
+            self.latency = int(value) / 1000.0
+        elif name == "multipv":
+            self.multipv = max(1, int(value))
+        elif name == "script" and value and value != "<empty>":
+            self.script = load_script(value)
+
+    def cmd_ucinewgame(self, _):
+        self.board = chess.Board()
+
+    def cmd_position(self, args):
+        words = args.split()
+        if not words:
+            return
+        if words[0] == "startpos":
+            board, rest = chess.Board(), words[1:]
+        elif words[0] == "fen":
+            end = words.index("moves") if "moves" in words else len(words)
+            board, rest = chess.Board(" ".join(words[1:end])), words[end:]
+        else:
+            return
+        if rest and rest[0] == "moves":
+            for uci in rest[1:]:
+                board.push_uci(uci)
+        self.board = board
+
+    def cmd_go(self, args):
+        words = args.split()
+        infinite = "infinite" in words or "ponder" in words
+        self.wait_search()
+        self.stop_ev.clear()
+        self.search = threading.Thread(target=self._search,
+                                       args=(self.board.copy(), infinite), daemon=True)
+        self.search.start()
+
+    def cmd_stop(self, _):
+        self.stop_ev.set()
+        self.wait_search()
+
+    def cmd_ponderhit(self, _):
+        self.stop_ev.set()
+
+    def wait_search(self):
+        if self.search is not None:
+            self.search.join()
+            self.search = None
+
+    # ── search ───────────────────────────────────────────────────────────────
+    def _lines(self, board: chess.Board) -> list:
+        """[(score cp or None, mate or None, pv)] for the top MultiPV lines."""
+        key = " ".join(board.fen().split()[:4])
+        pinned = self.script.get(key)
+        ranked = rank_moves(board)
+        if pinned and pinned.get("bestmove"):
+            move = chess.Move.from_uci(pinned["bestmove"])
+            ranked = ([(pinned.get("score", 0), move)]
+                      + [sm for sm in ranked if sm[1] != move])
+        elif pinned and "score" in pinned and ranked:
+            ranked[0] = (pinned["score"], ranked[0][1])
+        lines = []
+        for score, move in ranked[:self.multipv]:
+            board.push(move)
+            reply = rank_moves(board)[:1]
+            board.pop()
+            pv = [move] + [m for _, m in reply]
+            if abs(score) >= MATE:
+                lines.append((None, 1 if score > 0 else -1, pv))
+            else:
+                lines.append((score, None, pv))
+        return lines
+
+    def _search(self, board: chess.Board, infinite: bool):
+        if infinite:
+            self.stop_ev.wait()
+        else:
+            self.stop_ev.wait(self.latency)
+        if board.is_game_over():
+            self.send("info depth 0 score mate 0" if board.is_checkmate()
+                      else "info depth 0 score cp 0")
+            self.send("bestmove (none)")
+            return
+        lines = self._lines(board)
+        for i, (cp, mate, pv) in enumerate(lines, 1):
+            score = f"mate {mate}" if mate is not None else f"cp {cp}"
+            self.send(f"info depth 12 seldepth 12 multipv {i} score {score} "
+                      f"nodes 1000 nps 100000 time {int(self.latency * 1000)} "
+                      f"pv {' '.join(m.uci() for m in pv)}")
+        pv = lines[0][2]
+        ponder = f" ponder {pv[1].uci()}" if len(pv) > 1 else ""
+        self.send(f"bestmove {pv[0].uci()}{ponder}")
+
+    def run(self):
+        for raw in sys.stdin:
+            line = raw.strip()
+            if not line:
+                continue
+            cmd, _, args = line.partition(" ")
+            if cmd == "quit":
+                self.stop_ev.set()
+                break
+            handler = getattr(self, f"cmd_{cmd}", None)
+            if handler:
+                handler(args)
+
+
+def load_script(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return {" ".join(fen.split()[:4]): v for fen, v in json.load(f).items()}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Deterministic fake UCI engine.")
+    ap.add_argument("--latency", type=float, default=0.05,
+                    help="seconds to 'think' per search (default 0.05)")
+    ap.add_argument("--script", help="JSON file of FEN -> {score, bestmove}")
+    args = ap.parse_args()
+    FakeEngine(args.latency, load_script(args.script) if args.script else {}).run()
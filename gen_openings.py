@@ -1,5 +1,11 @@
+import argparse
+import io
 import json
+import os
+import time
 import chess.pgn
+from chess.pgn import MOVETEXT_REGEX, TAG_REGEX
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 # Minimal ECO dictionary (expand later)
@@ -9,52 +15,252 @@ ECO_NAMES = {
     "A49": "King's Indian Attack",
 }
 
-def extract_openings_from_folder(folder, json_path, max_moves=12):
+
+def _openings_from_handle(f, max_moves):
+    """Read every game from an open text handle -> (openings dict, game count)."""
     openings = {}
+    games = 0
+    while True:
+        game = chess.pgn.read_game(f)
+        if game is None:
+            break
+        games += 1
 
-    folder = Path(folder)
+        # Opening name
+        opening_name = game.headers.get("Opening")
+        eco = game.headers.get("ECO")
+
+        if not opening_name:
+            opening_name = ECO_NAMES.get(eco, f"ECO {eco}")
+
+        # Extract first N moves
+        board = game.board()
+        moves = []
+        for i, move in enumerate(game.mainline_moves()):
+            if i >= max_moves:
+                break
+            san = board.san(move)
+            san = san.replace("x", "").replace("+", "").replace("#", "")
+            moves.append(san)
+            board.push(move)
+
+        move_key = " ".join(moves)
+
+        if move_key and move_key not in openings:
+            openings[move_key] = opening_name
+    return openings, games
+
+
+RESULTS = ("*", "1-0", "0-1", "1/2-1/2")
+
+
+def _drop_comments(line, in_comment):
+    """Remove {...} comments (which may span lines) -> (text, still in comment)."""
+    out = []
+    i = 0
+    while True:
+        if in_comment:
+            j = line.find("}", i)
+            if j < 0:
+                return "".join(out), True
+            i, in_comment = j + 1, False
+        else:
+            j = line.find("{", i)
+            if j < 0:
+                out.append(line[i:])
+                return "".join(out), False
+            out.append(line[i:j])
+            out.append(" ")
+            i, in_comment = j + 1, True
+
+
+def _fast_openings_from_handle(f, max_moves):
+    """
+    Streaming scanner with the same output as _openings_from_handle, minus
+    the Game tree: it reads the tag pairs, tokenizes mainline movetext with
+    python-chess's movetext regex and stops collecting after max_moves
+    plies. The rest of the game is only checked for comment braces.
+
+    chess.pgn.read_headers isn't used because it skips the movetext we
+    need. SAN is taken as written in the file rather than regenerated from
+    a board, which is the same for the canonical SAN databases export.
+    """
+    openings = {}
+    games = 0
+    headers, moves = {}, []
+    in_game = False       # tags or moves seen since the last flush
+    in_moves = False      # past the tag section of the current game
+    in_comment = False    # inside a multi-line { ... } comment
+    depth = 0             # variation nesting
+    done = False          # max_moves reached or result seen
 
-    # Loop through ALL PGN files in the folder
-    for pgn_file in folder.glob("*.pgn"):
-        print(f"Processing {pgn_file.name}...")
+    def flush():
+        opening_name = headers.get("Opening")
+        if not opening_name:
+            eco = headers.get("ECO")
+            opening_name = ECO_NAMES.get(eco, f"ECO {eco}")
+        move_key = " ".join(moves)
+        if move_key and move_key not in openings:
+            openings[move_key] = opening_name
 
-        with pgn_file.open("r", encoding="utf-8", errors="ignore") as f:
+    for line in f:
+        if not in_comment and line.startswith("["):
+            tag = TAG_REGEX.match(line)
+            if tag:
+                if in_moves:                 # first tag of the next game
+                    flush()
+                    games += 1
+                    headers, moves = {}, []
+                    in_moves, depth, done = False, 0, False
+                in_game = True
+                headers[tag.group(1)] = tag.group(2)
+                continue
+        if line.startswith("%"):
+            continue
+
+        text, in_comment = _drop_comments(line, in_comment)
+        if not text.strip():
+            continue
+        in_moves = in_game = True
+        if done:
+            continue
+        semi = text.find(";")
+        if semi >= 0:
+            text = text[:semi]
+
+        for token in MOVETEXT_REGEX.finditer(text):
+            tok = token.group(0)
+            if tok == "(":
+                depth += 1
+            elif tok == ")":
+                depth -= 1
+            elif tok in RESULTS:
+                done = True
+                break
+            elif depth == 0 and token.group(1):
+                if tok.startswith("0"):
+                    tok = tok.replace("0", "O")
+                moves.append(tok.replace("x", ""))
+                if len(moves) >= max_moves:
+                    done = True
+                    break
+
+    if in_game:
+        flush()
+        games += 1
+    return openings, games
+
+
+def _scan_range(job):
+    """Worker: parse the games in bytes [start, end) of one PGN file."""
+    path, start, end, max_moves, fast = job
+    with open(path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8", errors="ignore")
+    scan = _fast_openings_from_handle if fast else _openings_from_handle
+    return scan(io.StringIO(text), max_moves)
+
+
+def _chunk_ranges(path, chunk_size):
+    """
+    Split a PGN file into byte ranges of roughly chunk_size, each starting
+    at an "[Event " line so that no game is cut in half.
+    """
+    size = path.stat().st_size
+    bounds = [0]
+    with path.open("rb") as f:
+        for target in range(chunk_size, size, chunk_size):
+            if target <= bounds[-1]:
+                continue
+            f.seek(target)
+            f.readline()                      # skip the partial line
             while True:
-                game = chess.pgn.read_game(f)
-                if game is None:
+                pos = f.tell()
+                line = f.readline()
+                if not line:
+                    pos = size
+                    break
+                if line.startswith(b"[Event "):
                     break
+            if pos >= size:
+                break
+            bounds.append(pos)
+    bounds.append(size)
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
 
-                # Opening name
-                opening_name = game.headers.get("Opening")
-                eco = game.headers.get("ECO")
+def extract_openings_from_folder(folder, json_path, max_moves=12, workers=1,
+                                 chunk_mb=64, fast=False):
+    """
+    Collect the first max_moves plies of every game in folder/*.pgn.
 
-                if not opening_name:
-                    opening_name = ECO_NAMES.get(eco, f"ECO {eco}")
+    With workers > 1 the files are split into byte-range chunks (one per
+    file, or several for files over chunk_mb) and parsed in a process
+    pool. Partial maps are merged in file/chunk order with the first line
+    seen winning, so the output is the same as a serial run.
 
-                # Extract first N moves
-                board = game.board()
-                moves = []
-                for i, move in enumerate(game.mainline_moves()):
-                    if i >= max_moves:
-                        break
-                    san = board.san(move)
-                    san = san.replace("x", "").replace("+", "").replace("#", "")
-                    moves.append(san)
-                    board.push(move)
+    fast=True uses the header-and-mainline scanner instead of
+    chess.pgn.read_game (see _fast_openings_from_handle).
+    """
+    openings = {}
+    folder = Path(folder)
+    files = sorted(folder.glob("*.pgn"))
+    chunk_size = max(1, int(chunk_mb * 1024 * 1024))
 
-                move_key = " ".join(moves)
+    jobs = []
+    for pgn_file in files:
+        for start, end in _chunk_ranges(pgn_file, chunk_size):
+            jobs.append((str(pgn_file), start, end, max_moves, fast))
+    print(f"Processing {len(files)} files in {len(jobs)} chunks "
+          f"with {workers} worker(s), max {max_moves} plies"
+          f"{' (fast scanner)' if fast else ''}...")
 
-                if move_key and move_key not in openings:
-                    openings[move_key] = opening_name
+    t0 = time.perf_counter()
+    total_games = 0
+    if workers > 1:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        results = pool.map(_scan_range, jobs)
+    else:
+        pool = None
+        results = map(_scan_range, jobs)
+    try:
+        for job, (partial, games) in zip(jobs, results):
+            total_games += games
+            for key, name in partial.items():
+                if key not in openings:
+                    openings[key] = name
+            elapsed = time.perf_counter() - t0
+            print(f"  {Path(job[0]).name} @{job[1]:,}: {games:,} games "
+                  f"({total_games / max(elapsed, 1e-9):,.0f} games/s)")
+    finally:
+        if pool:
+            pool.shutdown()
+    elapsed = time.perf_counter() - t0
 
     # Save JSON
     with open(json_path, "w", encoding="utf-8") as f:
         json.dump(openings, f, indent=4, ensure_ascii=False)
 
-    print(f"\nSaved {len(openings)} openings to {json_path}")
-
+    print(f"\nParsed {total_games:,} games in {elapsed:.1f}s "
+          f"({total_games / max(elapsed, 1e-9):,.0f} games/s)")
+    print(f"Saved {len(openings)} openings to {json_path}")
 
-# Run it on your openings folder
-extract_openings_from_folder("openings", "opening.json", max_moves=12)
 
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Build opening.json from a folder of PGN files.")
+    ap.add_argument("folder", nargs="?", default="openings")
+    ap.add_argument("output", nargs="?", default="opening.json")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                    help="worker processes (1 = serial, no pool)")
+    ap.add_argument("--max-moves", type=int, default=12,
+                    help="plies to keep per game")
+    ap.add_argument("--chunk-mb", type=float, default=64,
+                    help="split PGN files larger than this into chunks")
+    ap.add_argument("--fast", action="store_true",
+                    help="scan headers + first plies only instead of full game parsing")
+    args = ap.parse_args()
 
+    # Run it on your openings folder
+    extract_openings_from_folder(args.folder, args.output, max_moves=args.max_moves,
+                                 workers=args.workers, chunk_mb=args.chunk_mb,
+                                 fast=args.fast)
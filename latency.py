@@ -0,0 +1,158 @@
+"""
+latency.py
+==========
+Built-in latency instrumentation: how long every engine call, coach phase,
+speech wait and board redraw takes.
+
+A LatencyRecorder keeps, per metric name, the last `window` samples (for
+rolling percentiles) and a log-scale histogram of every sample since the
+start (or the last reset). It is thread-safe: the engine service loop,
+the Tk thread and the speech thread all record into the same one.
+
+    LATENCY = LatencyRecorder()
+    with LATENCY.timer("engine.play"):          # also fine around an await
+        result = await engine.play(board, limit)
+    LATENCY.record("speech.wait", seconds)
+
+    LATENCY.stats()            # {name: {"n", "mean", "p50", "p90", "p99", "max"}} in ms
+    LATENCY.dump("latency.json")
+    print(LATENCY.text())      # the table the GUI's debug overlay shows
+
+Metric names used by the game:
+    engine.play / engine.analyse / engine.configure   engine round trips (lock held)
+    engine.lock_wait      waiting for the slot's lock (another search in flight)
+    engine.cache_hit      analyse() answered from the eval cache
+    coach.search          engine reply + coach eval (gathered in parallel)
+    coach.tips            grading, tips and the spoken text
+    coach.next_eval       eval / best move for the player's next turn
+    coach.total           the whole _engine_and_coach task
+    coach.rule.<name>     one coach rule (coach.RULES) inside explain_move
+    speech.wait           reply ready -> move played (coach still talking)
+    ui.redraw             one full board redraw
+"""
+
+import json
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Histogram buckets: upper bounds in ms, 4 per power of ten from 0.1 ms to 100 s
+BUCKETS_MS = [round(10 ** (e / 4), 3) for e in range(-4, 21)]
+
+
+def percentile(sorted_ms: list, p: float) -> float:
+    """p-th percentile (0-100) of an ascending list, nearest-rank."""
+    if not sorted_ms:
+        return 0.0
+    k = max(0, math.ceil(p / 100 * len(sorted_ms)) - 1)
+    return sorted_ms[min(k, len(sorted_ms) - 1)]
+
+
+def _ms(ms: float) -> str:
+    """8-wide ms cell; sub-millisecond values (single coach rules) get 3 decimals."""
+    return f"{ms:>8.1f}" if ms >= 10 else f"{ms:>8.3f}"
+
+
+class _Metric:
+    __slots__ = ("recent", "count", "total", "max", "buckets")
+
+    def __init__(self, window: int):
+        self.recent  = deque(maxlen=window)    # ms, newest last
+        self.count   = 0
+        self.total   = 0.0
+        self.max     = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)   # last one: above 100 s
+
+    def add(self, ms: float):
+        self.recent.append(ms)
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+        for i, bound in enumerate(BUCKETS_MS):
+            if ms <= bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+
+class LatencyRecorder:
+    """Rolling per-metric latency percentiles plus all-time histograms."""
+
+    def __init__(self, window: int = 200, enabled: bool = True):
+        self.window  = window
+        self.enabled = enabled
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float):
+        if not self.enabled:
+            return
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = _Metric(self.window)
+            metric.add(seconds * 1000.0)
+
+    @contextmanager
+    def timer(self, name: str):
+        """Time the with-block (wall clock, so awaits inside it count too)."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - t0)
+
+    def reset(self):
+        with self._lock:
+            self._metrics.clear()
+
+    # ── reporting ─────────────────────────────────────────────────────────────
+    def stats(self) -> dict:
+        """{name: {n, mean, p50, p90, p99, max}} in ms; percentiles over the window."""
+        with self._lock:
+            snapshot = {name: (sorted(m.recent), m.count, m.total, m.max)
+                        for name, m in self._metrics.items()}
+        out = {}
+        for name, (recent, count, total, peak) in sorted(snapshot.items()):
+            out[name] = {"n": count,
+                         "mean": round(total / count, 3) if count else 0.0,
+                         "p50": round(percentile(recent, 50), 3),
+                         "p90": round(percentile(recent, 90), 3),
+                         "p99": round(percentile(recent, 99), 3),
+                         "max": round(peak, 3)}
+        return out
+
+    def histograms(self) -> dict:
+        """{name: {"<=bound_ms": count, ...}} with empty buckets left out."""
+        with self._lock:
+            snapshot = {name: list(m.buckets) for name, m in self._metrics.items()}
+        labels = [f"<={b:g}" for b in BUCKETS_MS] + [f">{BUCKETS_MS[-1]:g}"]
+        return {name: {label: n for label, n in zip(labels, buckets) if n}
+                for name, buckets in sorted(snapshot.items())}
+
+    def dump(self, path: str):
+        """Write stats and histograms (all in ms) to a JSON file."""
+        data = {"created": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "window": self.window,
+                "stats": self.stats(),
+                "histograms_ms": self.histograms()}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+
+    def text(self) -> str:
+        """Fixed-width table of the rolling stats (ms)."""
+        stats = self.stats()
+        if not stats:
+            return "no samples yet"
+        width = max(len("metric"), *(len(name) for name in stats))
+        lines = [f"{'metric':<{width}} {'n':>5} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}"]
+        for name, s in stats.items():
+            lines.append(f"{name:<{width}} {s['n']:>5} " + " ".join(
+                _ms(s[k]) for k in ("p50", "p90", "p99", "max")))
+        return "\n".join(lines)
+
+
+LATENCY = LatencyRecorder()     # the process-wide recorder the game records into
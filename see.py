@@ -0,0 +1,110 @@
+"""
+see.py
+======
+Static Exchange Evaluation: what a sequence of captures on one square wins
+or loses, worked out on bitboards without an engine.
+
+Both sides recapture with their least valuable piece each time and may stop
+whenever going on would lose more. Sliders lined up behind a capturing
+piece (a rook behind a rook, a bishop or queen behind a pawn) join in as
+the pieces in front leave the square's lines ("x-rays"). Pins and checks
+are ignored, as usual for SEE.
+
+    see(board, move)                    # centipawns the capture gains (< 0: loses)
+    see_square(board, sq, chess.BLACK)  # what Black wins by starting captures on sq (>= 0)
+
+The coach uses it for hung pieces and for capture advice: a piece can be
+"defended" and still be lost, and a "free" capture may walk into a losing
+exchange.
+"""
+
+import chess
+
+# Piece values in centipawns (coach re-exports this as coach.PIECE_VALUE; it
+# lives here so that coach can import this module without a cycle)
+PIECE_VALUE = {
+    chess.PAWN: 100, chess.KNIGHT: 320, chess.BISHOP: 330,
+    chess.ROOK: 500, chess.QUEEN: 900, chess.KING: 0
+}
+# The same, except that the king outweighs anything it could win, so it only
+# joins an exchange when nothing can recapture it
+SEE_VALUE = {**PIECE_VALUE, chess.KING: 20000}
+
+
+def _attackers(board: chess.Board, square: int, occupied: int) -> int:
+    """Pieces of both colours attacking square through the given occupancy."""
+    queens_rooks   = board.queens | board.rooks
+    queens_bishops = board.queens | board.bishops
+    attackers = (
+        (chess.BB_KING_ATTACKS[square] & board.kings)
+        | (chess.BB_KNIGHT_ATTACKS[square] & board.knights)
+        | (chess.BB_RANK_ATTACKS[square][chess.BB_RANK_MASKS[square] & occupied] & queens_rooks)
+        | (chess.BB_FILE_ATTACKS[square][chess.BB_FILE_MASKS[square] & occupied] & queens_rooks)
+        | (chess.BB_DIAG_ATTACKS[square][chess.BB_DIAG_MASKS[square] & occupied] & queens_bishops)
+        | (chess.BB_PAWN_ATTACKS[chess.BLACK][square] & board.pawns & board.occupied_co[chess.WHITE])
+        | (chess.BB_PAWN_ATTACKS[chess.WHITE][square] & board.pawns & board.occupied_co[chess.BLACK]))
+    return attackers & occupied
+
+
+def _least_valuable(board: chess.Board, attackers: int) -> int:
+    """Square of the cheapest piece in attackers, or None."""
+    for mask in (board.pawns, board.knights, board.bishops,
+                 board.rooks, board.queens, board.kings):
+        if attackers & mask:
+            return chess.lsb(attackers & mask)
+    return None
+
+
+def _swap(board: chess.Board, square: int, from_square: int, target_value: int,
+          occupied: int, side: chess.Color) -> int:
+    """Gain for side capturing on square with from_square, then best play by both."""
+    gains = [target_value]
+    value_on_square = SEE_VALUE[board.piece_type_at(from_square)]
+    while True:
+        occupied &= ~chess.BB_SQUARES[from_square]
+        side = not side
+        attackers = _attackers(board, square, occupied) & board.occupied_co[side]
+        from_square = _least_valuable(board, attackers)
+        if from_square is None:
+            break
+        gains.append(value_on_square - gains[-1])
+        value_on_square = SEE_VALUE[board.piece_type_at(from_square)]
+    # gains[i]: what the i-th capture nets its side if nothing follows; each
+    # side then chooses between capturing and standing pat, from the back.
+    for i in range(len(gains) - 1, 0, -1):
+        gains[i - 1] = -max(-gains[i - 1], gains[i])
+    return gains[0]
+
+
+def see(board: chess.Board, move: chess.Move) -> int:
+    """
+    Material (cp) the side to move gains by playing the capture move and
+    letting the exchange on its square run its course. 0 for non-captures.
+    """
+    square = move.to_square
+    occupied = board.occupied
+    if board.is_en_passant(move):
+        target_value = SEE_VALUE[chess.PAWN]
+        occupied &= ~chess.BB_SQUARES[square - 8 if board.turn == chess.WHITE else square + 8]
+    else:
+        captured = board.piece_type_at(square)
+        if captured is None:
+            return 0
+        target_value = SEE_VALUE[captured]
+    mover = board.color_at(move.from_square)
+    return _swap(board, square, move.from_square, target_value, occupied, mover)
+
+
+def see_square(board: chess.Board, square: int, color: chess.Color) -> int:
+    """
+    Material (cp) color wins by starting an exchange on square with its
+    cheapest attacker, or 0 when it has no capture there worth making.
+    """
+    target = board.piece_type_at(square)
+    if target is None or board.color_at(square) == color:
+        return 0
+    attackers = _attackers(board, square, board.occupied) & board.occupied_co[color]
+    from_square = _least_valuable(board, attackers)
+    if from_square is None:
+        return 0
+    return max(0, _swap(board, square, from_square, SEE_VALUE[target], board.occupied, color))
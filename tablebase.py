@@ -0,0 +1,112 @@
+"""
+tablebase.py
+============
+Optional Syzygy endgame tablebases (chess.syzygy).
+
+Put the .rtbw/.rtbz files in the syzygy/ folder (or point SYZYGY_PATH in
+test.py elsewhere). Nothing is required: without tables every probe just
+returns None and the engine is used as before.
+
+When a position has few enough pieces the coach and the engine ask the
+tables instead of Stockfish: the answers are exact and take microseconds.
+
+    tb = Tablebase("syzygy")
+    tb.covers(board)        # few enough pieces, no castling rights, tables loaded
+    tb.probe(board)         # (wdl, dtz) for the side to move
+    tb.white_cp(board)      # eval in centipawns from White's side (win = TB_WIN_CP)
+    tb.best_move(board)     # (move, wdl, dtz) with perfect play
+
+WDL: 2 win, 1 win that the 50-move rule turns into a draw ("cursed"),
+0 draw, -1 "blessed" loss, -2 loss. DTZ: plies to the next capture or
+pawn move with best play (sign as for WDL).
+"""
+
+from pathlib import Path
+
+import chess
+import chess.syzygy
+
+TB_WIN_CP = 1500     # a tablebase win in the centipawn scale the coach uses
+
+
+class Tablebase:
+    """Lazily opened Syzygy tables; every probe returns None when unavailable."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.max_pieces = 0
+        self._tb = None
+        if not self.path.is_dir():
+            return
+        try:
+            tb = chess.syzygy.open_tablebase(str(self.path))
+        except Exception as e:
+            print(f"[Tablebase] could not open {self.path}: {e}")
+            return
+        names = list(tb.wdl)
+        if not names:
+            tb.close()
+            return
+        self._tb = tb
+        self.max_pieces = max(len(name.replace("v", "")) for name in names)
+        print(f"[Tablebase] {len(names)} tables, up to {self.max_pieces} pieces")
+
+    def __bool__(self):
+        return self._tb is not None
+
+    def covers(self, board: chess.Board) -> bool:
+        return (self._tb is not None
+                and chess.popcount(board.occupied) <= self.max_pieces
+                and not board.castling_rights)
+
+    def probe(self, board: chess.Board):
+        """(wdl, dtz) for the side to move, or None."""
+        if not self.covers(board):
+            return None
+        try:
+            return self._tb.probe_wdl(board), self._tb.probe_dtz(board)
+        except (KeyError, chess.syzygy.MissingTableError):
+            return None
+
+    def white_cp(self, board: chess.Board):
+        """Tablebase eval in centipawns from White's point of view, or None."""
+        hit = self.probe(board)
+        if hit is None:
+            return None
+        wdl = hit[0]
+        cp = TB_WIN_CP if wdl == 2 else -TB_WIN_CP if wdl == -2 else 0
+        return float(cp if board.turn == chess.WHITE else -cp)
+
+    def best_move(self, board: chess.Board):
+        """
+        (move, wdl, dtz) of the best move for the side to move, or None.
+        Keeps the best result; among wins the fastest conversion (smallest
+        DTZ), among losses the longest resistance.
+        """
+        if not self.covers(board):
+            return None
+        best, best_key = None, None
+        for move in board.legal_moves:
+            board.push(move)
+            try:
+                wdl = -self._tb.probe_wdl(board)
+                dtz = -self._tb.probe_dtz(board)
+            except (KeyError, chess.syzygy.MissingTableError):
+                return None
+            finally:
+                board.pop()
+            key = (wdl, -abs(dtz) if wdl > 0 else abs(dtz))
+            if best_key is None or key > best_key:
+                best, best_key = (move, wdl, dtz), key
+        return best
+
+    def close(self):
+        if self._tb is not None:
+            self._tb.close()
+            self._tb = None
+
+
+def wdl_text(wdl: int) -> str:
+    return {2: "winning", 1: "winning (but the 50-move rule saves them)",
+            0: "drawn", -1: "losing (but the 50-move rule saves you)",
+            -2: "losing"}.get(wdl, "unclear")
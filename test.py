@@ -1,12 +1,31 @@
 import tkinter as tk
 from tkinter import messagebox, simpledialog, font as tkfont
+import asyncio
 import chess
 import chess.engine
+import chess.polyglot
 import threading
 from pathlib import Path
 import json
+import mmap
+import os
+import queue
+import struct
 import time
-import winsound
+try:
+    import winsound
+except ImportError:                    # not Windows: no beeps
+    winsound = None
+from analysis_pool import AnalysisPool
+from coach import (GRADE_HEADERS, GRADE_SYMBOLS, PIECE_NAME, PIECE_VALUE,
+                   grade_move, mover_drop, why_better)
+from coach_cache import CoachCache
+from engine_resources import cpu_cores, engine_resources
+from engine_service import EngineService, EngineResult, engine_command
+from eval_cache import EvalCache
+from latency import LATENCY
+from tablebase import Tablebase, wdl_text
+from time_manager import allocate
 try:
     import tksvg
     HAS_TKSVG = True
@@ -15,25 +34,165 @@ except ImportError:
 
 # ── Paths ─────────────────────────────────────────────────────────────────────
 PIECES_FOLDER = Path("pieces")
-ENGINE_PATH   = Path("stockfish/stockfish-windows-x86-64-avx2.exe")
+# CHESS_ENGINE=fake_uci.py runs the game without Stockfish (see fake_uci.py)
+ENGINE_PATH   = Path(os.environ.get("CHESS_ENGINE", "stockfish/stockfish-windows-x86-64-avx2.exe"))
 STATS_FILE    = "chess_stats.json"
+BOOK_BIN_PATH = Path("Clean_openings.bin")
+EVAL_CACHE_FILE = "eval_cache.sqlite"
+COACH_CACHE_FILE = "coach_cache.sqlite"   # remembered coach tips (None = this session only)
+PONDER_MULTIPV   = 5     # candidate lines kept while pondering the player's turn
+PONDER_MIN_DEPTH = 8     # shallower ponder results are ignored by the coach
+ENGINE_POOL_SIZE = 2     # Stockfish processes: 1 = the coach shares the opponent's engine
+COACH_SKILL_LEVEL = 20   # the coach's own engine always analyses at full strength
+CLOCK_START     = 600.0  # seconds per side
+CLOCK_INCREMENT = 0.0    # seconds added after each move (Fischer increment)
+SYZYGY_PATH     = Path("syzygy")   # optional Syzygy tablebase files (.rtbw/.rtbz)
+TABLEBASE_PLAY_SKILL = 20          # below this the engine keeps its handicap in endgames too
+REVIEW_LIMIT = chess.engine.Limit(time=0.3, depth=18)   # per position in the post-game analysis
+LATENCY_FILE = "latency.json"      # F11 dumps the latency stats here; F12 toggles the overlay
+UI_POLL_MS   = 25                  # how often the Tk thread drains results from background threads
 
 # ── Opening book (ECO prefix table) ───────────────────────────────────────────
 
-def _load_openings() -> dict:
-    """Load openings from opening.json if it exists, otherwise use built-in list."""
+def _strip_san(san: str) -> str:
+    """Strip x, +, # — the opening book stores moves in this form."""
+    return san.replace("x","").replace("+","").replace("#","")
+
+
+class _TrieNode:
+    __slots__ = ("children", "name", "line")
+
+    def __init__(self):
+        self.children = {}     # stripped SAN -> _TrieNode, in book order
+        self.name     = None   # opening name if this exact line is a book key
+        self.line     = None   # (name, tokens) of the first book key through here
+
+
+class OpeningTrie:
+    """
+    Move trie over the opening book — one node per stripped-SAN token.
+    Lookups cost O(line length) instead of a scan over every book key.
+    """
+
+    def __init__(self, openings: dict):
+        self.root = _TrieNode()
+        for key, name in openings.items():
+            self.add(key.split(), name)
+
+    def add(self, tokens: list, name: str):
+        tokens = [_strip_san(t) for t in tokens]
+        node = self.root
+        for tok in tokens:
+            child = node.children.get(tok)
+            if child is None:
+                child = node.children[tok] = _TrieNode()
+            if child.line is None:
+                child.line = (name, tokens)
+            node = child
+        if node.name is None:
+            node.name = name
+
+    def find(self, tokens: list):
+        """Return the node for this move sequence, or None if out of book."""
+        node = self.root
+        for tok in tokens:
+            node = node.children.get(_strip_san(tok))
+            if node is None:
+                return None
+        return node
+
+    def continuations(self, tokens: list) -> list:
+        """
+        Book continuations after `tokens`, in book order, as
+        (next_move, opening_name, remaining_line_tokens).
+        """
+        node = self.find(tokens)
+        if node is None:
+            return []
+        return self.children_of(node, len(tokens))
+
+    @staticmethod
+    def children_of(node: _TrieNode, depth: int) -> list:
+        return [(tok, child.line[0], child.line[1][depth:])
+                for tok, child in node.children.items()]
+
+
+class OpeningTracker:
+    """
+    Follows the game through the opening trie one ply at a time, so the
+    current opening name is known in O(1) without replaying the game.
+    push() after every move, pop() on undo, reset() on a new game.
+    """
+
+    def __init__(self, trie: OpeningTrie):
+        self.trie = trie
+        self.reset()
+
+    def reset(self):
+        # (trie node or None once out of book, best opening name so far)
+        self._stack = [(self.trie.root, "")]
+
+    def push(self, san: str, board: chess.Board = None):
+        """Advance one ply. Pass the board after the move to also probe the position book."""
+        node, name = self._stack[-1]
+        if node is not None:
+            node = node.children.get(_strip_san(san))
+            if node is not None and node.name:
+                name = node.name
+        if board is not None:
+            name = book_name(board) or name
+        self._stack.append((node, name))
+
+    def pop(self):
+        if len(self._stack) > 1:
+            self._stack.pop()
+
+    def replay(self, board: chess.Board):
+        self.reset()
+        tmp = chess.Board()
+        for m in board.move_stack:
+            san = tmp.san(m)
+            tmp.push(m)
+            self.push(san, tmp)
+
+    @property
+    def name(self) -> str:
+        return self._stack[-1][1]
+
+    def in_book(self) -> bool:
+        """Does the move-order book know any continuation from here?"""
+        node = self._stack[-1][0]
+        return node is not None and bool(node.children)
+
+    def continuations(self) -> list:
+        """Book continuations from the current position (see OpeningTrie.continuations)."""
+        node = self._stack[-1][0]
+        if node is None:
+            return []
+        return self.trie.children_of(node, len(self._stack) - 1)
+
+
+def _load_openings() -> tuple:
+    """
+    Load openings from Clean_openings.json if it exists, otherwise use the
+    built-in list. Returns (openings dict, OpeningTrie built from it).
+    """
     json_path = Path("Clean_openings.json")
-    if json_path.exists():
+    if BOOK_BIN_PATH.exists():
+        # The binary position book covers the full database; don't pay for
+        # parsing the JSON as well — the small built-in list orders theory moves.
+        json_path = None
+    if json_path and json_path.exists():
         try:
             with open(json_path, encoding="utf-8") as f:
                 data = json.load(f)
             print(f"Loaded {len(data)} openings from opening.json")
-            return data
+            return data, OpeningTrie(data)
         except Exception as e:
             print(f"Could not load opening.json: {e} — using built-in list")
 
     # Built-in fallback
-    return {
+    data = {
     # --- 1. e4 ---
     "e4": "King's Pawn Opening",
     "e4 e5": "Open Game",
@@ -154,26 +313,108 @@ def _load_openings() -> dict:
     "h3": "Clemenz Opening",
     "a4": "Ware Opening",
     "h4": "Desprez Opening",
-}
+    }
+    return data, OpeningTrie(data)
+
+
+class BinaryOpeningBook:
+    """
+    Read-only view of Clean_openings.bin (format: see clean_openings.py).
+    The file is memory-mapped and binary-searched, so opening it costs no
+    parsing and lookups touch ~log2(N) records.
+    """
+    # Must match clean_openings.py
+    MAGIC  = b"COBK"
+    HEADER = struct.Struct("<4sHHIII")
+    RECORD = struct.Struct("<QI")
+
+    def __init__(self, path: Path):
+        self._file = open(path, "rb")
+        self._mm   = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self._count, name_count, names_offset = \
+            self.HEADER.unpack_from(self._mm, 0)
+        if magic != self.MAGIC or version != 1:
+            raise ValueError(f"{path} is not a version 1 opening book")
+        self.names = []
+        pos = names_offset
+        for _ in range(name_count):
+            (n,) = struct.unpack_from("<H", self._mm, pos)
+            self.names.append(self._mm[pos + 2:pos + 2 + n].decode("utf-8"))
+            pos += 2 + n
+
+    def __len__(self):
+        return self._count
+
+    def get(self, key: int, default=None):
+        lo, hi = 0, self._count
+        base, size, unpack = self.HEADER.size, self.RECORD.size, self.RECORD.unpack_from
+        while lo < hi:
+            mid = (lo + hi) // 2
+            h, name_id = unpack(self._mm, base + mid * size)
+            if h < key:
+                lo = mid + 1
+            elif h > key:
+                hi = mid
+            else:
+                return self.names[name_id]
+        return default
+
 
-OPENINGS = _load_openings()
+def _load_position_book():
+    """
+    Load the Zobrist-keyed book written by clean_openings.py, or None.
+    Keyed by position rather than move order, so transpositions are found.
+    Prefers the memory-mapped binary book; the JSON index is the fallback.
+    """
+    if BOOK_BIN_PATH.exists():
+        try:
+            book = BinaryOpeningBook(BOOK_BIN_PATH)
+            print(f"Mapped {len(book)} book positions from {BOOK_BIN_PATH}")
+            return book
+        except Exception as e:
+            print(f"Could not map {BOOK_BIN_PATH}: {e} — trying JSON")
+
+    json_path = Path("Clean_openings_zobrist.json")
+    if json_path.exists():
+        try:
+            with open(json_path, encoding="utf-8") as f:
+                data = {int(h, 16): name for h, name in json.load(f).items()}
+            print(f"Loaded {len(data)} book positions from {json_path}")
+            return data
+        except Exception as e:
+            print(f"Could not load {json_path}: {e} — using move-order book")
+    return None
+
+# Loaded by load_resources(), not at import: AnalysisPool's worker processes
+# (spawned on Windows) re-import this file as __mp_main__, and each of them
+# would otherwise parse the opening database, map the book and open the
+# tablebases just to run an engine.
+OPENINGS = OPENING_TRIE = POSITION_BOOK = TABLEBASE = None
+
+
+def load_resources():
+    """Load the opening books and tablebases once (idempotent)."""
+    global OPENINGS, OPENING_TRIE, POSITION_BOOK, TABLEBASE
+    if OPENING_TRIE is None:
+        OPENINGS, OPENING_TRIE = _load_openings()
+        POSITION_BOOK = _load_position_book()
+        TABLEBASE = Tablebase(SYZYGY_PATH)
+
+
+def book_name(board: chess.Board):
+    """Opening name of this exact position from the position book, or None."""
+    if POSITION_BOOK is None:
+        return None
+    return POSITION_BOOK.get(chess.polyglot.zobrist_hash(board))
 
 Theory_Moves = []
 
 def detect_opening(board: chess.Board) -> str:
     """Return the best matching opening name for the current move stack."""
-    moves = list(board.move_stack)
-    tmp = chess.Board()
-    san_list = []
-    for m in moves:
-        san_list.append(tmp.san(m).replace("x","").replace("+","").replace("#",""))
-        tmp.push(m)
-    # Walk backwards from longest prefix to shortest
-    for length in range(len(san_list), 0, -1):
-        key = " ".join(san_list[:length])
-        if key in OPENINGS:
-            return OPENINGS[key]
-    return ""
+    load_resources()
+    tracker = OpeningTracker(OPENING_TRIE)
+    tracker.replay(board)
+    return tracker.name
 
 
 # ── Sound: voice-only, no beeps (beeps clash with TTS on Windows) ─────────────
@@ -185,6 +426,7 @@ class ChessUltimate:
     PAD = 20          # board left/top padding inside canvas
 
     def __init__(self, root: tk.Tk):
+        load_resources()
         self.root = root
         self.root.title("♟ Chess Master Ultimate")
         self.root.geometry("1120x980")
@@ -196,6 +438,9 @@ class ChessUltimate:
         self.player_name  = "Player 1"
         self.board        = chess.Board()
         self.engine       = None
+        self.engine_options = {}       # Threads/Hash picked by engine_resources
+        self.eval_cache   = EvalCache(EVAL_CACHE_FILE)
+        self.coach_cache  = CoachCache(COACH_CACHE_FILE)
         self.skill_level  = 5
         self.selected_sq  = None
         self.legal_targets= set()
@@ -209,10 +454,27 @@ class ChessUltimate:
         self.review_mode  = False
         self.review_idx   = 0
         self.review_boards= []         # board FEN snapshots after each move
+        self.review_evals = {}         # FEN -> analysis info from the full-game analysis
+        self.review_grades= {}         # move index -> coach grade
+        self.review_gen   = 0          # bumped per review so stale results are dropped
+        self.analysis_pool = None      # AnalysisPool, started on first review
+        self._review_jobs = []
         self.engine_busy  = False
         self.tts_busy = False
-        self.openings = OPENINGS
+        self.opening_tracker = OpeningTracker(OPENING_TRIE)
         self.move_counter = 0
+        self.combined_search = True    # one engine search per move (see _engine_and_coach)
+        self.game_id      = 0          # lets the engine ponderhit within one game
+        self.ponder_mode  = True       # analyse in the background during White's turn
+        self._ponder      = None       # running AnalysisResult, if any
+        self._ponder_token = 0         # bumped by every ponder start/stop request
+        self._pondering   = False      # a ponder is running or being started
+        self.play_slot    = 0          # engine pool slot the opponent plays from
+        self.coach_slot   = 1 if ENGINE_POOL_SIZE > 1 else 0   # coach analysis + pondering
+        self.ui_queue     = queue.Queue()  # EngineResults for the Tk thread
+        self._pending_move = None      # (move_counter, reply, since) waiting for speech
+        self.latency_overlay = False   # F12: rolling latency table over the board
+        self._latency_after = None
 
 
         # ── Coach ─────────────────────────────────────────────────────────────
@@ -223,8 +485,8 @@ class ChessUltimate:
         self.theory_arrows    = []            # list of (from_sq, to_sq, color) for theory display
 
         # ── Clocks ────────────────────────────────────────────────────────────
-        self.white_time = 600.0
-        self.black_time = 600.0
+        self.white_time = CLOCK_START
+        self.black_time = CLOCK_START
         self.last_tick  = time.time()
 
         # ── Speech via Windows SAPI (win32com) — reliable background thread ──
@@ -233,20 +495,29 @@ class ChessUltimate:
         self._speech_busy = False
 
         def _worker():
-            import win32com.client
-            sapi = win32com.client.Dispatch("SAPI.SpVoice")
-            sapi.Rate = 1
+            try:
+                import win32com.client
+                sapi = win32com.client.Dispatch("SAPI.SpVoice")
+                sapi.Rate = 1
+            except Exception as e:
+                # No SAPI (not Windows / no pywin32): drop texts but keep
+                # reporting speech_idle so the engine's moves still go out
+                print(f"[SAPI] speech disabled: {e}")
+                sapi = None
             while True:
                 text = self._speech_q.get()
                 if text is None:
                     break
                 self._speech_busy = True
                 try:
-                    sapi.Speak(text)
+                    if sapi is not None:
+                        sapi.Speak(text)
                 except Exception as e:
                     print(f"[SAPI] error: {e}")
                 finally:
                     self._speech_busy = False
+                if self._speech_q.empty():
+                    self.ui_queue.put(EngineResult("speech_idle", None, None, None))
 
         threading.Thread(target=_worker, daemon=True).start()
 
@@ -256,10 +527,13 @@ class ChessUltimate:
         self.speak_async = speak_async
 
         # ── Build UI ──────────────────────────────────────────────────────────
+        self.root.bind("<F11>", lambda e: self.dump_latency())
+        self.root.bind("<F12>", lambda e: self.toggle_latency_overlay())
         self.init_engine()
         self.create_ui()
         self.load_piece_images()
         self.update_clock()
+        self._poll_background()
         self.root.after(150, self.redraw)
         self.root.after(300, self._ask_name_on_start)
 
@@ -294,21 +568,108 @@ class ChessUltimate:
     def init_engine(self):
         if ENGINE_PATH.exists():
             try:
-                self.engine = chess.engine.SimpleEngine.popen_uci(str(ENGINE_PATH))
-                self.engine.configure({"Skill Level": self.skill_level})
+                # Threads/Hash sized to this machine (see engine_settings.json)
+                self.engine_options = engine_resources(ENGINE_POOL_SIZE)
+                self.engine = EngineService(engine_command(ENGINE_PATH),
+                                            {"Skill Level": self.skill_level,
+                                             **self.engine_options},
+                                            cache=self.eval_cache,
+                                            results=self.ui_queue,
+                                            size=ENGINE_POOL_SIZE,
+                                            latency=LATENCY)
+                if self.coach_slot != self.play_slot:
+                    self.engine.run(self.engine.configure(
+                        {"Skill Level": COACH_SKILL_LEVEL}, slot=self.coach_slot))
+                self._start_ponder()
             except Exception as e:
                 pass  # engine init failed
 
+    def _coach_skill(self) -> int:
+        if self.coach_slot != self.play_slot:
+            return COACH_SKILL_LEVEL
+        return self.skill_level
+
+    async def _analyse(self, board: chess.Board, limit: chess.engine.Limit) -> dict:
+        """Coach engine.analyse through the persistent eval cache (Skill Level changes results)."""
+        return await self.engine.analyse(board, limit, tag=f"skill={self._coach_skill()}",
+                                         slot=self.coach_slot)
+
+    # Pondering never blocks the Tk thread: the start and stop run as engine
+    # service tasks, and the AnalysisResult handle arrives through ui_queue
+    # ("ponder", see _on_ponder_started). Every start/stop bumps
+    # _ponder_token, so a handle that arrives after its ponder was already
+    # stopped or replaced is recognised and stopped at once.
+    def _start_ponder(self):
+        """Analyse self.board in the background while the player thinks."""
+        self._stop_ponder()
+        if (not self.engine or not self.ponder_mode or self.review_mode or self.engine_busy
+                or self.board.turn != chess.WHITE or self.board.is_game_over()
+                or TABLEBASE.covers(self.board)):
+            return
+        self._pondering = True
+        # gen=None: an undo must not cancel the start and lose the handle
+        self.engine.submit("ponder", None, self._ponder_start(self._ponder_token,
+                                                               self.board.copy()))
+
+    async def _ponder_start(self, token: int, board: chess.Board):
+        analysis = await self.engine.start_analysis(board, slot=self.coach_slot,
+                                                    multipv=PONDER_MULTIPV,
+                                                    game=self.game_id)
+        return token, analysis
+
+    def _on_ponder_started(self, msg):
+        if msg.error is not None:
+            print(f"Ponder start failed: {msg.error}")
+            self._pondering = False
+            return
+        token, analysis = msg.value
+        if token != self._ponder_token:
+            self.engine.submit("ponder_stop", None, self.engine.stop_analysis(analysis))
+            return
+        self._ponder = analysis
+
+    def _take_ponder(self):
+        """End pondering and hand over the running AnalysisResult (or None) unstopped."""
+        self._ponder_token += 1
+        self._pondering = False
+        ponder, self._ponder = self._ponder, None
+        return ponder
+
+    def _stop_ponder(self):
+        """Stop pondering (in the background, results discarded)."""
+        ponder = self._take_ponder()
+        if ponder is not None:
+            self.engine.submit("ponder_stop", None, self.engine.stop_analysis(ponder))
+
+    async def _harvest_ponder(self, ponder) -> list:
+        """Stop a ponder handed over by _take_ponder -> multipv info dicts (best first)."""
+        if ponder is None:
+            return []
+        try:
+            return await self.engine.stop_analysis(ponder)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            return []
+
     def set_difficulty(self, level):
         text = {0: "Easy", 10: "Medium", 20: "Pro"}.get(level, "Easy")
 
         self.skill_level = level
 
         if self.engine:
-            try:
-                self.engine.configure({"Skill Level": level})
-            except:
-                pass
+            # Only the opponent's engine changes; pondering on a separate
+            # coach engine carries on.
+            shared = self.coach_slot == self.play_slot
+            pondering = shared and self._pondering
+            if shared:
+                self._stop_ponder()
+            # Queued behind any search in flight; never cancelled by undo
+            self.engine.submit("configure", None,
+                               self.engine.configure({"Skill Level": level},
+                                                     slot=self.play_slot))
+            if pondering:
+                self._start_ponder()
 
         self.diff_label.config(text=f"Difficulty: {text}")
         self.speak_async(f"Difficulty set to {text}")
@@ -529,42 +890,125 @@ class ChessUltimate:
     # ──────────────────────────────────────────────────────────────────────────
 
     def get_book_suggestions(self):
-        current_moves = " ".join(m.replace("x","").replace("+","").replace("#","") for m in self.move_history)
-        suggestions = []
-        # חיפוש כל הפתיחות שמתחילות במהלכים ששיחקת עד עכשיו
-        for moves_sequence, name in self.openings.items():
-            if moves_sequence.startswith(current_moves) and moves_sequence != current_moves:
-                # חילוץ המהלך הבא בלבד
-                remainder = moves_sequence[len(current_moves):].strip()
-                next_move = remainder.split()[0]
-                suggestions.append(f"{next_move} ({name})")
+        # המהלכים ששיחקת עד עכשיו, ומהם ההמשכים בספר הפתיחות
+        suggestions = [f"{next_move} ({name})"
+                       for next_move, name, _ in self.book_continuations()]
         return suggestions[:3]  # החזרת 3 האפשרויות הראשונות
 
     def get_theory_moves(self):
-        # הופך את היסטוריית המהלכים למחרוזת (למשל "e4 e5")
-        current_sequence = " ".join(m.replace("x","").replace("+","").replace("#","") for m in self.move_history).strip()
         theory_suggestions = {}
-
-        for moves, name in self.openings.items():
-            # אם הפתיחה ב-JSON מתחילה בדיוק במהלכים ששיחקנו
-            if moves.startswith(current_sequence) and moves != current_sequence:
-                # מחלצים את המהלך הבא בלבד
-                after_current = moves[len(current_sequence):].strip()
-                next_move = after_current.split()[0]
-                if next_move not in theory_suggestions:
-                    theory_suggestions[next_move] = name
+        for next_move, name, _ in self.book_continuations():
+            theory_suggestions.setdefault(next_move, name)
 
         return theory_suggestions  # מחזיר מילון של {מהלך: שם הפתיחה}
 
+    def book_continuations(self) -> list:
+        """
+        Book moves from the current position as (san, opening_name, line),
+        where line starts with san and follows the book for up to 3 plies.
+        With a position book every legal move is probed by hash, so moves
+        that transpose back into the book are found too; the move-order
+        book's ordering is kept for moves it knows.
+        """
+        trie_moves = self.opening_tracker.continuations()
+        if POSITION_BOOK is None:
+            return trie_moves
+
+        order = {tok: i for i, (tok, _, _) in enumerate(trie_moves)}
+        board = self.board.copy(stack=False)
+        found = []
+        for move in list(board.legal_moves):
+            san = board.san(move)
+            board.push(move)
+            name = book_name(board)
+            if name:
+                found.append((san, name, [san] + self._book_line(board, 2)))
+            board.pop()
+        found.sort(key=lambda c: order.get(_strip_san(c[0]), len(order)))
+        seen = {_strip_san(c[0]) for c in found}
+        found.extend(c for c in trie_moves if c[0] not in seen)
+        return found
+
+    def has_book_move(self) -> bool:
+        """
+        Cheap form of bool(book_continuations()): stops at the first book
+        move and builds no SAN or lines.
+        """
+        if self.opening_tracker.in_book():
+            return True
+        if POSITION_BOOK is None:
+            return False
+        board = self.board.copy(stack=False)
+        for move in board.legal_moves:
+            board.push(move)
+            hit = book_name(board)
+            board.pop()
+            if hit:
+                return True
+        return False
+
+    @staticmethod
+    def _book_line(board: chess.Board, plies: int) -> list:
+        """Follow the first book move for up to `plies` plies; board is restored."""
+        line = []
+        for _ in range(plies):
+            for move in list(board.legal_moves):
+                board.push(move)
+                if book_name(board):
+                    board.pop()
+                    line.append(board.san(move))
+                    board.push(move)
+                    break
+                board.pop()
+            else:
+                break
+        for _ in line:
+            board.pop()
+        return line
+
     def redraw(self):
-        self.canvas.delete("all")
-        self.draw_squares()
-        self.draw_legal_dots()
-        self.draw_coach_highlight()
-        self.draw_theory_arrows()
-        self.draw_pieces()
-        self.draw_eval_bar()
-        self.update_captured_display()
+        with LATENCY.timer("ui.redraw"):
+            self.canvas.delete("all")
+            self.draw_squares()
+            self.draw_legal_dots()
+            self.draw_coach_highlight()
+            self.draw_theory_arrows()
+            self.draw_pieces()
+            self.draw_eval_bar()
+            self.update_captured_display()
+        self.draw_latency_overlay()
+
+    def draw_latency_overlay(self):
+        """Debug overlay (F12): the rolling latency table, top-left of the board."""
+        self.canvas.delete("latency")
+        if not self.latency_overlay:
+            return
+        text = LATENCY.text() + "\n" + self.coach_cache.summary()
+        item = self.canvas.create_text(6, 6, text=text, anchor="nw",
+                                       fill="#7CFC00", font=("Consolas", 9), tags="latency")
+        x1, y1, x2, y2 = self.canvas.bbox(item)
+        bg = self.canvas.create_rectangle(x1 - 4, y1 - 4, x2 + 4, y2 + 4, fill="#000000",
+                                          stipple="gray75", outline="", tags="latency")
+        self.canvas.tag_lower(bg, item)
+
+    def toggle_latency_overlay(self):
+        self.latency_overlay = not self.latency_overlay
+        if self._latency_after is not None:
+            self.root.after_cancel(self._latency_after)
+            self._latency_after = None
+        self._refresh_latency_overlay()
+
+    def _refresh_latency_overlay(self):
+        self.draw_latency_overlay()
+        if self.latency_overlay:
+            self._latency_after = self.root.after(1000, self._refresh_latency_overlay)
+
+    def dump_latency(self):
+        try:
+            LATENCY.dump(LATENCY_FILE)
+            self.status_var.set(f"Latency stats saved to {LATENCY_FILE}")
+        except Exception as e:
+            print(f"Latency dump failed: {e}")
 
     def sq_xy(self, sq):
         """Top-left pixel of a square."""
@@ -697,15 +1141,9 @@ class ChessUltimate:
     # Coach
     # ──────────────────────────────────────────────────────────────────────────
 
-    # Piece values in centipawns
-    PIECE_VALUE = {
-        chess.PAWN: 100, chess.KNIGHT: 320, chess.BISHOP: 330,
-        chess.ROOK: 500, chess.QUEEN: 900, chess.KING: 0
-    }
-    PIECE_NAME = {
-        chess.PAWN: "pawn", chess.KNIGHT: "knight", chess.BISHOP: "bishop",
-        chess.ROOK: "rook", chess.QUEEN: "queen", chess.KING: "king"
-    }
+    # Piece values in centipawns (shared with coach.py)
+    PIECE_VALUE = PIECE_VALUE
+    PIECE_NAME  = PIECE_NAME
 
     def toggle_coach(self):
         self.coach_on = not self.coach_on
@@ -732,374 +1170,12 @@ class ChessUltimate:
 
     def _explain_move_thorough(self, move: chess.Move, board: chess.Board,
                                drop: float, best: chess.Move) -> list:
-        """
-        Generate ALL coaching tips for a move, sorted by importance.
-        """
-
-        tips = []
-        board_after = board.copy()
-        board_after.push(move)
-        moved_piece = board_after.piece_at(move.to_square)
-        piece_moved = board.piece_at(move.from_square)
-        move_count = len(board.move_stack)
-
-        PNAME = self.PIECE_NAME
-
-        # INTERNAL list of (priority, message)
-        # Lower number = more important
-        PRIORITY = []
-
-        def add(priority, text):
-            PRIORITY.append((priority, text))
-
-        # ───────────────────────────────────────────────────────────────
-        # 1. Hung a piece (undefended after move)
-        # ───────────────────────────────────────────────────────────────
-        if moved_piece and moved_piece.color == chess.WHITE:
-            attackers = board_after.attackers(chess.BLACK, move.to_square)
-            defenders = board_after.attackers(chess.WHITE, move.to_square)
-            if attackers and not defenders:
-                pname = PNAME.get(moved_piece.piece_type, "piece")
-                sq_name = chess.square_name(move.to_square)
-                add(1, f"⚠ Your {pname} on {sq_name} is undefended — the opponent can take it!")
-
-        # ───────────────────────────────────────────────────────────────
-        # 2. Left another piece hanging
-        # ───────────────────────────────────────────────────────────────
-        if piece_moved:
-            for sq in chess.SQUARES:
-                p = board.piece_at(sq)
-                if p and p.color == chess.WHITE and sq != move.from_square:
-                    was_defended = bool(board.attackers(chess.WHITE, sq))
-                    now_defended = bool(board_after.attackers(chess.WHITE, sq))
-                    now_attacked = bool(board_after.attackers(chess.BLACK, sq))
-                    if now_attacked and not now_defended and was_defended:
-                        pname = PNAME.get(p.piece_type, "piece")
-                        add(2, f"⚠ Moving away left your {pname} on {chess.square_name(sq)} undefended!")
-                        break
-
-        # ───────────────────────────────────────────────────────────────
-        # 3. Missed free capture
-        # ───────────────────────────────────────────────────────────────
-        if best is not None and best in board.legal_moves and board.is_capture(best) and not board.is_capture(move):
-            captured = board.piece_at(best.to_square)
-            if captured:
-                cap_pname = PNAME.get(captured.piece_type, "piece")
-                best_piece = board.piece_at(best.from_square)
-                bp_name = PNAME.get(best_piece.piece_type, "piece") if best_piece else "piece"
-                add(3, f"💰 Your {bp_name} on {chess.square_name(best.from_square)} could have captured "
-                       f"the opponent's {cap_pname} on {chess.square_name(best.to_square)} for free!")
-
-        # ───────────────────────────────────────────────────────────────
-        # 4. Missed check
-        # ───────────────────────────────────────────────────────────────
-        if best is not None and best in board.legal_moves:
-            test2 = board.copy();
-            test2.push(best)
-            if test2.is_check() and not board_after.is_check():
-                best_piece = board.piece_at(best.from_square)
-                bp_name = PNAME.get(best_piece.piece_type, "piece") if best_piece else "piece"
-                add(4, f"🎯 Your {bp_name} on {chess.square_name(best.from_square)} could have moved to "
-                       f"{chess.square_name(best.to_square)} and put the King in check!")
-
-        # ───────────────────────────────────────────────────────────────
-        # 5. Missed checkmate
-        # ───────────────────────────────────────────────────────────────
-        if best is not None and best in board.legal_moves:
-            test3 = board.copy();
-            test3.push(best)
-            if test3.is_checkmate():
-                best_piece = board.piece_at(best.from_square)
-                bp_name = PNAME.get(best_piece.piece_type, "piece") if best_piece else "piece"
-                add(0,
-                    f"👑 You missed CHECKMATE! {bp_name} to {chess.square_name(best.to_square)} was the winning move!")
-
-        # ───────────────────────────────────────────────────────────────
-        # 6. Suggest better move (with explanation)
-        # ───────────────────────────────────────────────────────────────
-        if best is not None and best in board.legal_moves and best != move and drop >= 10:
-            best_piece = board.piece_at(best.from_square)
-            my_piece = piece_moved
-            reason = self._why_better(best, best_piece, board, board_after)
-
-            if best_piece and my_piece and best_piece.piece_type != my_piece.piece_type:
-                bp_name = PNAME.get(best_piece.piece_type, "piece")
-                my_name = PNAME.get(my_piece.piece_type, "piece")
-                to_sq = chess.square_name(best.to_square)
-                from_sq = chess.square_name(best.from_square)
-                add(5, f"💡 Instead of the {my_name}, consider moving your {bp_name} "
-                       f"from {from_sq} to {to_sq}. {reason}")
-            else:
-                bp_name = PNAME.get(best_piece.piece_type, "piece")
-                to_sq = chess.square_name(best.to_square)
-                add(5, f"💡 The {bp_name} was right but {to_sq} is a stronger square. {reason}")
-
-        # ───────────────────────────────────────────────────────────────
-        # 7. King safety: moved king early
-        # ───────────────────────────────────────────────────────────────
-        if piece_moved and piece_moved.piece_type == chess.KING:
-            if board.has_castling_rights(chess.WHITE):
-                add(6, "🏰 Moving your King early loses castling rights — try to castle first to stay safe!")
-
-        # ───────────────────────────────────────────────────────────────
-        # 8. Pawn structure: doubled pawns
-        # ───────────────────────────────────────────────────────────────
-        if piece_moved and piece_moved.piece_type == chess.PAWN:
-            col = chess.square_file(move.to_square)
-            pawns_on_col = sum(
-                1 for sq in chess.SQUARES
-                if board_after.piece_at(sq)
-                and board_after.piece_at(sq).piece_type == chess.PAWN
-                and board_after.piece_at(sq).color == chess.WHITE
-                and chess.square_file(sq) == col
-            )
-            if pawns_on_col >= 2:
-                add(7, "📌 You now have doubled pawns — they can be hard to defend.")
-
-        # ───────────────────────────────────────────────────────────────
-        # 9. Opening: early queen
-        # ───────────────────────────────────────────────────────────────
-        if move_count <= 14 and piece_moved:
-            if piece_moved.piece_type == chess.QUEEN and move_count < 6:
-                undeveloped = []
-                for sq in chess.SQUARES:
-                    p = board_after.piece_at(sq)
-                    if p and p.color == chess.WHITE and p.piece_type in (chess.KNIGHT, chess.BISHOP):
-                        if chess.square_rank(sq) == 0:
-                            undeveloped.append(PNAME.get(p.piece_type, "piece"))
-                if undeveloped:
-                    add(8, f"⚠ Bringing your Queen out early is risky — develop your {undeveloped[0]} first!")
-
-        # ───────────────────────────────────────────────────────────────
-        # 10. Positive: good development
-        # ───────────────────────────────────────────────────────────────
-        if move_count <= 10 and piece_moved:
-            if piece_moved.piece_type in (chess.KNIGHT, chess.BISHOP):
-                add(20, "👌 Good — developing your pieces early is the right idea!")
-            elif piece_moved.piece_type == chess.PAWN:
-                from_rank = chess.square_rank(move.from_square)
-                if from_rank == 1 and chess.square_rank(move.to_square) == 3 and drop < 20:
-                    add(20, "👌 Good central pawn push — controlling the centre!")
-
-        # ───────────────────────────────────────────────────────────────
-        # 11. Positive: good capture
-        # ───────────────────────────────────────────────────────────────
-        if board.is_capture(move) and drop < 10:
-            captured = board.piece_at(move.to_square)
-            if captured:
-                cap_val = self.PIECE_VALUE.get(captured.piece_type, 0)
-                mover_val = self.PIECE_VALUE.get(piece_moved.piece_type, 0) if piece_moved else 0
-                if cap_val >= mover_val:
-                    add(21, "💥 Nice capture! You traded well.")
-
-        # ───────────────────────────────────────────────────────────────
-        # 12. Positive: castling
-        # ───────────────────────────────────────────────────────────────
-        if board.is_castling(move):
-            add(22, "🏰 Great — castling keeps your King safe and connects your Rooks!")
-
-        # ───────────────────────────────────────────────────────────────
-        # 13–19. EXTRA COACHING LAYERS (all 8 upgrades)
-        # ───────────────────────────────────────────────────────────────
-
-        # 13. Blunder severity
-        if drop >= 600:
-            add(1, "This move is a serious blunder — it heavily worsens your position.")
-        elif drop >= 200:
-            add(4, "This move is a mistake — it weakens your position.")
-        elif drop >= 50:
-            add(10, "This move is a small inaccuracy — there was a more precise option.")
-
-        # 14. Threat detection
-        for sq in chess.SQUARES:
-            p = board_after.piece_at(sq)
-            if p and p.color == chess.WHITE:
-                if board_after.is_attacked_by(chess.BLACK, sq) and not board.is_attacked_by(chess.BLACK, sq):
-                    pname = PNAME.get(p.piece_type, "piece")
-                    add(3, f"⚠ After this move, your {pname} on {chess.square_name(sq)} is now under attack.")
-                    break
-
-        # 15. Strategic plan suggestions
-        white_king_sq = board_after.king(chess.WHITE)
-        if white_king_sq is not None and chess.square_rank(white_king_sq) == 0 and move_count > 8:
-            add(12, "Try to castle soon — keeping your King in the center too long is risky.")
-
-        # undeveloped minor pieces
-        undeveloped = []
-        for sq, p in board_after.piece_map().items():
-            if p.color == chess.WHITE and p.piece_type in (chess.KNIGHT, chess.BISHOP):
-                if chess.square_rank(sq) == 0:
-                    undeveloped.append(PNAME.get(p.piece_type, "piece"))
-        if undeveloped and move_count <= 20:
-            add(13, f"Consider developing your remaining {undeveloped[0]} — get all your pieces active.")
-
-        # 16. Positional concepts
-        # Knight outpost
-        for sq, p in board_after.piece_map().items():
-            if p.color == chess.WHITE and p.piece_type == chess.KNIGHT:
-                rank = chess.square_rank(sq)
-                if rank in (3, 4):
-                    add(14, "Nice — your knight is on a strong outpost, hard to challenge.")
-                    break
-
-        # Bad bishop — only if own pawns block its diagonals
-        for sq, p in board_after.piece_map().items():
-            if p.color == chess.WHITE and p.piece_type == chess.BISHOP:
-                bishop_attacks = len(list(board_after.attacks(sq)))
-                # A bishop on an open diagonal attacks 7-13 squares; if very few, it's blocked
-                if bishop_attacks <= 3:
-                    add(15, "Your bishop is blocked by your own pawns — consider opening the diagonal.")
-                break
-
-        # 17. Opening principles
-        if move_count <= 14:
-            # Re-count undeveloped pieces fresh here to avoid scope issues
-            undeveloped_now = [
-                PNAME.get(p.piece_type, "piece")
-                for sq, p in board_after.piece_map().items()
-                if p.color == chess.WHITE
-                   and p.piece_type in (chess.KNIGHT, chess.BISHOP)
-                   and chess.square_rank(sq) == 0
-            ]
-            if len(undeveloped_now) >= 2 and move_count > 6:
-                add(16, "Try not to move the same piece twice early — develop all your pieces first.")
-
-        # 18. Endgame coaching
-        pieces = board_after.piece_map()
-        num_queens = sum(1 for p in pieces.values() if p.piece_type == chess.QUEEN)
-        if num_queens == 0:
-            ksq = board_after.king(chess.WHITE)
-            if ksq and chess.square_rank(ksq) <= 1:
-                add(17, "In the endgame, activate your King — it becomes a strong piece.")
-
-        # 19. Move category label (fallback)
-        if piece_moved and not PRIORITY:
-            add(30, "This is a quiet improving move — it slightly improves your position.")
-
-        # ───────────────────────────────────────────────────────────────
-        # SORT BY PRIORITY and return messages only
-        # ───────────────────────────────────────────────────────────────
-        PRIORITY.sort(key=lambda x: x[0])
-        return [msg for _, msg in PRIORITY]
+        """Coaching tips for a move, most important first (see coach.explain_move)."""
+        return self.coach_cache.explain_move(move, board, drop, best)
 
     def _why_better(self, best: chess.Move, best_piece, board: chess.Board,
                     board_after: chess.Board) -> str:
-        """Return a detailed plain-English reason why the best move is better."""
-        to_sq    = best.to_square
-        from_sq  = best.from_square
-        to_file  = chess.square_file(to_sq)
-        to_rank  = chess.square_rank(to_sq)
-        to_name  = chess.square_name(to_sq)
-        bp_name  = self.PIECE_NAME.get(best_piece.piece_type, "piece")
-        move_num = len(board.move_stack)
-
-        central      = {chess.D4, chess.D5, chess.E4, chess.E5}
-        near_centre  = {chess.C3,chess.C4,chess.C5,chess.C6,
-                        chess.D3,chess.D6,chess.E3,chess.E6,
-                        chess.F3,chess.F4,chess.F5,chess.F6}
-
-        board_after_best = board.copy()
-        board_after_best.push(best)
-
-        reasons = []
-
-        # ── Checkmate ─────────────────────────────────────────────────────────
-        if board_after_best.is_checkmate():
-            return f"That move is CHECKMATE — the game would be over immediately! Always look for the King hunt!"
-
-        # ── Check ─────────────────────────────────────────────────────────────
-        if board_after_best.is_check():
-            reasons.append(f"it puts the opponent's King in check, forcing them to deal with the threat instead of developing their own attack")
-
-        # ── Capture ───────────────────────────────────────────────────────────
-        captured = board.piece_at(to_sq)
-        if captured:
-            cap_name = self.PIECE_NAME.get(captured.piece_type, "piece")
-            cap_val  = self.PIECE_VALUE.get(captured.piece_type, 0)
-            mv_val   = self.PIECE_VALUE.get(best_piece.piece_type, 0)
-            if cap_val > mv_val:
-                diff = cap_val - mv_val
-                reasons.append(f"it captures the opponent's {cap_name} for free — you gain {diff} points of material advantage")
-            elif cap_val == mv_val:
-                reasons.append(f"it captures the opponent's {cap_name} in an even exchange — keeping material balanced")
-            else:
-                reasons.append(f"it captures a piece, removing it from the board")
-
-        # ── Fork (attacks two pieces at once) ────────────────────────────────
-        attacked_pieces = []
-        for sq in chess.SQUARES:
-            p = board_after_best.piece_at(sq)
-            if p and p.color == chess.BLACK and p.piece_type != chess.KING:
-                if board_after_best.is_attacked_by(chess.WHITE, sq):
-                    attacked_pieces.append(self.PIECE_NAME.get(p.piece_type, "piece"))
-        if len(attacked_pieces) >= 2:
-            reasons.append(f"it forks the opponent — attacking their {attacked_pieces[0]} and {attacked_pieces[1]} at the same time, and they can only save one!")
-
-        # ── Attacks a valuable undefended piece ───────────────────────────────
-        elif attacked_pieces:
-            for sq in chess.SQUARES:
-                p = board_after_best.piece_at(sq)
-                if p and p.color == chess.BLACK:
-                    if board_after_best.is_attacked_by(chess.WHITE, sq):
-                        defenders = board_after_best.attackers(chess.BLACK, sq)
-                        pname = self.PIECE_NAME.get(p.piece_type, "piece")
-                        pval  = self.PIECE_VALUE.get(p.piece_type, 0)
-                        mv_val = self.PIECE_VALUE.get(best_piece.piece_type, 0)
-                        if not defenders:
-                            reasons.append(f"it attacks the opponent's undefended {pname} on {chess.square_name(sq)} — they must move it or lose it")
-                        elif pval > mv_val:
-                            reasons.append(f"it threatens to win the opponent's {pname} on {chess.square_name(sq)} which is worth more than your {bp_name}")
-                        break
-
-        # ── Central control ───────────────────────────────────────────────────
-        if to_sq in central:
-            controlled = len([sq for sq in chess.SQUARES
-                              if board_after_best.is_attacked_by(chess.WHITE, sq)])
-            reasons.append(f"placing your {bp_name} on {to_name} gives it maximum reach — central pieces control the most squares and influence both sides of the board")
-        elif to_sq in near_centre and best_piece.piece_type in (chess.KNIGHT, chess.BISHOP):
-            reasons.append(f"{to_name} is a strong outpost near the centre, giving your {bp_name} excellent influence over the key squares")
-
-        # ── Development (opening principles) ─────────────────────────────────
-        if move_num <= 14 and chess.square_rank(from_sq) == 0:
-            if best_piece.piece_type == chess.KNIGHT:
-                squares_controlled = len(list(board_after_best.attacks(to_sq)))
-                reasons.append(f"it develops your Knight which now controls {squares_controlled} squares — in the opening, get your pieces off the back rank as quickly as possible")
-            elif best_piece.piece_type == chess.BISHOP:
-                diagonal_len = len(list(board_after_best.attacks(to_sq)))
-                reasons.append(f"it activates your Bishop with a diagonal controlling {diagonal_len} squares — Bishops become much stronger when they have open diagonals")
-
-        # ── King safety ───────────────────────────────────────────────────────
-        if best_piece.piece_type == chess.KING and board.is_castling(best):
-            reasons.append("castling tucks your King safely behind your pawns and connects your Rooks — two important goals in one move!")
-
-        # ── Rook on open file ─────────────────────────────────────────────────
-        if best_piece.piece_type == chess.ROOK:
-            file_pawns = [sq for sq in chess.SQUARES
-                         if board_after_best.piece_at(sq) and
-                         board_after_best.piece_at(sq).piece_type == chess.PAWN and
-                         chess.square_file(sq) == to_file]
-            if not file_pawns:
-                reasons.append(f"it places your Rook on an open file with no pawns blocking it — Rooks are most powerful on open files where they can attack freely")
-
-        # ── Piece activity comparison ─────────────────────────────────────────
-        if not reasons:
-            my_squares_before = len(list(board.attacks(from_sq)))
-            my_squares_after  = len(list(board_after_best.attacks(to_sq)))
-            if my_squares_after > my_squares_before:
-                diff = my_squares_after - my_squares_before
-                reasons.append(f"your {bp_name} controls {diff} more squares from {to_name} than where it was — more active pieces give you more options every turn")
-            elif best_piece.piece_type == chess.QUEEN:
-                reasons.append(f"the Queen is more centralised and harder to attack from {to_name}")
-            else:
-                reasons.append(f"your {bp_name} is simply more active and better placed on {to_name}")
-
-        if reasons:
-            if len(reasons) == 1:
-                return f"Because {reasons[0]}."
-            else:
-                return f"Because {reasons[0]}, and also {reasons[1]}."
-
-        return "It gives your piece a more active and influential role in the position."
+        return why_better(best, best_piece, board, board_after)
 
     def draw_coach_highlight(self):
         """Draw green arrow/highlight for the suggested best move."""
@@ -1128,9 +1204,14 @@ class ChessUltimate:
         for i in range(0, len(self.move_history), 2):
             w_san = self.move_history[i]
             b_san = self.move_history[i + 1] if i + 1 < len(self.move_history) else ""
+            # review analysis marks (?!, ?, ??, !) once they are known
+            w_san += GRADE_SYMBOLS.get(self.review_grades.get(i), "")
+            if b_san:
+                b_san += GRADE_SYMBOLS.get(self.review_grades.get(i + 1), "")
             move_num = i // 2 + 1
             self.hist_list.insert(tk.END, f"  {move_num:2d}. {w_san:<8} {b_san}")
-        self.hist_list.yview_moveto(1.0)  # scroll to bottom
+        if not self.review_mode:
+            self.hist_list.yview_moveto(1.0)  # scroll to bottom
 
     # ──────────────────────────────────────────────────────────────────────────
     # Click handler
@@ -1203,10 +1284,11 @@ class ChessUltimate:
         is_capture = self.board.is_capture(move)
         is_castle  = self.board.is_castling(move)
         self._record_capture(move)
-        board_before = self.board.copy()   # snapshot for coach
+        board_before = self.board.copy(stack=False)   # snapshot for coach (no move stack)
 
         move_san = self.board.san(move)
         self.board.push(move)
+        self.white_time += CLOCK_INCREMENT
 
         self.speak_async(f"{self.player_name} plays {move_san}")
 
@@ -1218,74 +1300,164 @@ class ChessUltimate:
         self.move_history.append(san)
         self.review_boards.append(self.board.fen())
         self.refresh_history()
-        self.opening_label.config(text=detect_opening(self.board))
+        self.opening_tracker.push(san, self.board)
+        self.opening_label.config(text=self.opening_tracker.name)
         self.redraw()
 
         self.status_var.set("Engine thinking…")
 
+        # What the engine found while the player was thinking is harvested
+        # by the reply task (stopping the analysis is an engine round trip)
+        ponder = self._take_ponder()
+
         if self.board.is_game_over():
+            if ponder is not None:
+                self.engine.submit("ponder_stop", None, self.engine.stop_analysis(ponder))
             self.handle_end()
         else:
             self.engine_busy = True
-            threading.Thread(
-                target=self._engine_and_coach,
-                args=(move, board_before),
-                daemon=True).start()
-
-    def _engine_and_coach(self, player_move: chess.Move, board_before: chess.Board):
+            if self.engine:
+                self.engine.submit("reply", self.move_counter,
+                                   self._reply(self.board.copy(), move, board_before,
+                                               ponder, self.has_book_move()))
+
+    async def _reply(self, board: chess.Board, player_move: chess.Move,
+                     board_before: chess.Board, ponder, in_book: bool):
+        """Engine loop: harvest the ponder, then _engine_and_coach with a limit that uses it."""
+        ponder_lines = await self._harvest_ponder(ponder)
+        limit = self._engine_limit(board, player_move, ponder_lines, in_book)
+        return await self._engine_and_coach(board, player_move, board_before, limit,
+                                            ponder_lines)
+
+    def _engine_limit(self, board: chess.Board, player_move: chess.Move,
+                      ponder_lines: list = (), in_book: bool = False) -> chess.engine.Limit:
         """
-        Background thread with Opening Theory integration and Undo protection.
+        Search limit for the engine's reply to player_move (board is the
+        position after it): the real clocks, plus a think time from
+        time_manager.allocate (short in book, forced or recapture positions,
+        longer when the player's move changed the eval a lot according to
+        the ponder lines). Runs on the engine loop, so in_book comes from
+        the Tk thread (has_book_move).
         """
-        if not self.engine:
-            return
+        swing = 0.0
+        scored = [l for l in ponder_lines if l.get("pv") and "score" in l]
+        for line in scored:
+            if line["pv"][0] == player_move:
+                best = scored[0]["score"].white().score(mate_score=3000) or 0
+                swing = best - (line["score"].white().score(mate_score=3000) or 0)
+                break
+        think = allocate(board, self.black_time, CLOCK_INCREMENT,
+                         in_book=in_book, eval_swing=swing)
+        return chess.engine.Limit(time=think,
+                                  white_clock=self.white_time, black_clock=self.black_time,
+                                  white_inc=CLOCK_INCREMENT, black_inc=CLOCK_INCREMENT)
+
+    async def _engine_and_coach(self, board: chess.Board, player_move: chess.Move,
+                                board_before: chess.Board, limit: chess.engine.Limit,
+                                ponder_lines: list = ()):
+        """
+        Runs on the engine service loop, with Opening Theory integration.
+        board is a copy of the position after player_move and limit the
+        engine's search limit for it; ponder_lines are the multipv results
+        of pondering board_before. Returns a dict for _on_reply, which runs
+        on the Tk thread. An undo cancels the task.
+        """
+        t_start = time.perf_counter()
+        # Pondering searched the exact position the player moved from: its
+        # best line replaces the previous turn's prediction, and if the
+        # player's move is one of its lines the drop needs no new search.
+        best_before = self.best_move_before
+        pre_eval = self.pre_move_eval
+        known_post_eval = None
+        lines = [l for l in ponder_lines
+                 if l.get("pv") and "score" in l and l.get("depth", 0) >= PONDER_MIN_DEPTH]
+        if lines:
+            best_before = lines[0]["pv"][0]
+            pre_eval = float(lines[0]["score"].white().score(mate_score=3000) or 0)
+            for line in lines:
+                if line["pv"][0] == player_move:
+                    known_post_eval = float(line["score"].white().score(mate_score=3000) or 0)
+                    break
 
-        # 1. שמירת המצב הנוכחי להגנה מפני Undo
-        start_move_count = self.move_counter
+        # Syzygy: with few enough pieces the tables answer exactly, so they
+        # replace the coach's searches and (at full strength) the engine's.
+        tb_before = TABLEBASE.best_move(board_before)     # (move, wdl, dtz) or None
+        tb_after = TABLEBASE.probe(board)                 # Black to move
+        if tb_before is not None and tb_after is not None:
+            best_before = tb_before[0]
+            pre_eval = TABLEBASE.white_cp(board_before)
+            known_post_eval = TABLEBASE.white_cp(board)
+        tb_reply = None
+        if self.skill_level >= TABLEBASE_PLAY_SKILL:
+            tb_reply = TABLEBASE.best_move(board)
 
         coach_msg = None
         coach_tag = "good"
         coach_hi = None
         spoken_tip = None
 
+        # ── Step 0: Engine search (+ coach eval in parallel) ──────────────────
+        # Combined search: one play() with info + ponder replaces
+        # analyse → play → analyse: its score is the post-move eval (drop)
+        # and, if the engine played its principal variation, also the eval
+        # for our next turn; the ponder move is the predicted best reply for
+        # White. The engine keeps pondering on that reply while the player
+        # thinks, and the next play() turns it into a ponderhit if the
+        # player chose it.
+        # With a separate coach engine in the pool the coach scores the move
+        # itself, at full strength and at the same time as the play() — the
+        # reply costs the slower of the two searches instead of their sum.
+        play_kwargs = {}
+        if self.combined_search:
+            play_kwargs = {"info": chess.engine.INFO_SCORE | chess.engine.INFO_PV,
+                           "ponder": not self.ponder_mode, "game": self.game_id}
+        searches = []
+        if tb_reply is None:
+            searches.append(self.engine.play(board, limit,
+                                             slot=self.play_slot,
+                                             options={"Skill Level": self.skill_level},
+                                             **play_kwargs))
+        parallel = self.coach_slot != self.play_slot
+        if (self.coach_on and known_post_eval is None
+                and (parallel or not self.combined_search)):
+            searches.append(self._post_move_eval(board))
+        with LATENCY.timer("coach.search"):
+            coach_eval = await asyncio.gather(*searches)
+        if tb_reply is None:
+            result = coach_eval.pop(0)
+        else:
+            result = chess.engine.PlayResult(tb_reply[0], None)
+
+        combined_eval = None
+        score = result.info.get("score")
+        if self.combined_search and score is not None:
+            combined_eval = float(score.white().score(mate_score=3000) or 0)
+
         # ── Step 1: Coach feedback & Opening Theory ──────────────────────────
+        t_tips = time.perf_counter()
         if self.coach_on:
             try:
-                best = self.best_move_before
+                best = best_before
 
                 # חישוב ה-Drop (הפרש איכות המהלך)
-                try:
-                    info_after = self.engine.analyse(self.board, chess.engine.Limit(depth=10, time=0.3))
-                    score_after = info_after["score"].white()
-                    post_eval = float(score_after.score(mate_score=3000) or 0)
-                    drop = self.pre_move_eval - post_eval
-                except:
-                    drop = 0.0
+                if known_post_eval is not None:
+                    post_eval = known_post_eval
+                elif coach_eval and coach_eval[0] is not None:
+                    post_eval = coach_eval[0]
+                else:
+                    post_eval = combined_eval
+                drop = pre_eval - post_eval if post_eval is not None else 0.0
 
                 # קביעת ציון למהלך
                 player_played_best = (best is not None and player_move == best)
-                if player_played_best:
-                    grade = "best"
-                elif drop >= 250:
-                    grade = "blunder"
-                elif drop >= 100:
-                    grade = "mistake"
-                elif drop >= 40:
-                    grade = "inaccuracy"
-                else:
-                    grade = "good"
-
-                headers = {
-                    "best": "✅ Best move! Well done!",
-                    "good": "👍 Good move!",
-                    "inaccuracy": "💡 Inaccuracy – better options existed.",
-                    "mistake": "⚠️ Mistake – you lost advantage.",
-                    "blunder": "❌ Blunder! Significant loss.",
-                }
-                msg_lines = [headers.get(grade, "👍 Move played.")]
+                grade = grade_move(drop, player_played_best)
+                msg_lines = [GRADE_HEADERS.get(grade, "👍 Move played.")]
 
                 # הוספת הסברים (Tips)
                 tips = self._explain_move_thorough(player_move, board_before, drop, best)
                 msg_lines.extend(tips)
+                if tb_before is not None and tb_after is not None:
+                    msg_lines.append(self._tablebase_tip(tb_before[1], -tb_after[0]))
 
                 # הצגת המהלך הטוב ביותר אם טעינו
                 if grade not in ("best", "good") and best is not None:
@@ -1309,71 +1481,143 @@ class ChessUltimate:
                 spoken_parts = [_clean_for_tts(ln) for ln in msg_lines if ln.strip()]
                 spoken_tip = " . ".join(spoken_parts)
 
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 print(f"Coach analysis error: {e}")
+            LATENCY.record("coach.tips", time.perf_counter() - t_tips)
 
-        # ── Step 2: Engine plays ──────────────────────────────────────────────
+        # ── Step 2 & 3: Eval & Pre-analysis for next turn ─────────────────────
+        t_next = time.perf_counter()
+        new_pre_eval = None
+        new_best_move = None
+        pv = result.info.get("pv", [])
+        next_board = board.copy()
+        next_board.push(result.move)
+        tb_next = TABLEBASE.best_move(next_board)
+        if tb_next is not None:
+            new_pre_eval = TABLEBASE.white_cp(next_board)
+            new_best_move = tb_next[0]
+        elif combined_eval is not None and pv and pv[0] == result.move and result.ponder:
+            # The engine followed its own PV, so the search already scored
+            # the position after its move and predicted White's best reply.
+            new_pre_eval = combined_eval
+            new_best_move = result.ponder
+        else:
+            # Separate search: legacy mode, or Skill Level made the engine
+            # deviate from its PV.
+            try:
+                info3 = await self._analyse(next_board, chess.engine.Limit(depth=12))
+                s3 = info3["score"].white()
+                new_pre_eval = float(s3.score(mate_score=3000) or 0)
+                new_best_move = info3.get("pv", [None])[0]
+            except asyncio.CancelledError:
+                raise
+            except:
+                pass
+        LATENCY.record("coach.next_eval", time.perf_counter() - t_next)
+        LATENCY.record("coach.total", time.perf_counter() - t_start)
+
+        return {"move": result.move, "coach_msg": coach_msg, "coach_tag": coach_tag,
+                "coach_hi": coach_hi, "spoken_tip": spoken_tip,
+                "pre_eval": new_pre_eval, "best_move": new_best_move}
+
+    @staticmethod
+    def _tablebase_tip(before: int, after: int) -> str:
+        """Endgame tip from the tablebase verdicts (WDL for White) before and after the move."""
+        if after >= before:
+            return f"📚 Tablebase: the position is still {wdl_text(after)} for you."
+        return (f"📚 Tablebase: this was {wdl_text(before)}, "
+                f"now it is {wdl_text(after)} — check the better move.")
+
+    async def _post_move_eval(self, board: chess.Board):
+        """Coach's score of the position after the player's move (cp, white pov) or None."""
         try:
-            result = self.engine.play(self.board, chess.engine.Limit(time=0.6),
-                                      options={"Skill Level": self.skill_level})
+            info_after = await self._analyse(board, chess.engine.Limit(depth=10, time=0.3))
+            score_after = info_after["score"].white()
+            return float(score_after.score(mate_score=3000) or 0)
+        except asyncio.CancelledError:
+            raise
         except:
-            self.root.after(0, lambda: setattr(self, 'engine_busy', False))
-            return
+            return None
 
-        # ── Step 3 & 4: Eval & Pre-analysis for next turn ─────────────────────
-        new_pre_eval = 0.0
-        new_best_move = None
+    # ── Results from the engine service / speech thread ──────────────────────
+    # Background threads only put EngineResults on ui_queue; Tk calls from
+    # them are unsafe (and event_generate could deadlock against the Tk
+    # thread waiting on the engine loop), so the Tk thread polls.
+    def _poll_background(self):
         try:
-            test_board = self.board.copy()
-            test_board.push(result.move)
-            info3 = self.engine.analyse(test_board, chess.engine.Limit(depth=12))
-            s3 = info3["score"].white()
-            new_pre_eval = float(s3.score(mate_score=3000) or 0)
-            new_best_move = info3.get("pv", [None])[0]
-            self.eval_score = new_pre_eval
-        except:
-            pass
+            self._on_background_result()
+        finally:
+            self.root.after(UI_POLL_MS, self._poll_background)
 
-        # ── Deliver ───────────────────────────────────────────────────────────
-        def _deliver():
-            # הגנה מפני Undo
-            if self.move_counter != start_move_count:
-                print("Undo detected - cleaning up engine state.")
-                self.engine_busy = False  # שחרור נעילה גם כאן ליתר ביטחון
+    def _on_background_result(self):
+        """Tk thread: handle everything queued by the engine service and speech."""
+        while True:
+            try:
+                msg = self.ui_queue.get_nowait()
+            except queue.Empty:
                 return
+            if msg.kind == "reply":
+                self._on_reply(msg)
+            elif msg.kind == "speech_idle":
+                self._play_pending_move()
+            elif msg.kind == "review":
+                self._on_review_result(msg)
+            elif msg.kind == "ponder":
+                self._on_ponder_started(msg)
+            elif msg.error is not None:
+                print(f"Engine {msg.kind} failed: {msg.error}")
+
+    def _on_reply(self, msg):
+        # הגנה מפני Undo
+        if msg.gen != self.move_counter:
+            print("Undo detected - dropping stale engine reply.")
+            return
+        if msg.error is not None or msg.value is None:
+            print(f"Engine error: {msg.error}")
+            self.engine_busy = False
+            self.status_var.set("Engine error – your turn")
+            return
+        reply = msg.value
 
-            if coach_msg and self.coach_on:
-                self._coach_msg(coach_msg, coach_tag)
-                self.coach_highlight = coach_hi
-                self.redraw()
-
-            if spoken_tip and self.coach_on:
-                self.coach_speak("Coach says: " + spoken_tip)
-
-            def _wait_then_move():
-                # הגנה נוספת בתוך ה-wait למקרה של Undo ברגע האחרון
-                if self.move_counter != start_move_count:
-                    self.engine_busy = False  # שחרור נעילה
-                    return
+        if reply["coach_msg"] and self.coach_on:
+            self._coach_msg(reply["coach_msg"], reply["coach_tag"])
+            self.coach_highlight = reply["coach_hi"]
+            self.redraw()
 
-                if self._speech_busy or not self._speech_q.empty():
-                    self.root.after(300, _wait_then_move)
-                else:
-                    self.execute_engine_move(result.move)
-                    self.pre_move_eval = new_pre_eval
-                    self.best_move_before = new_best_move
+        if reply["spoken_tip"] and self.coach_on:
+            self.coach_speak("Coach says: " + reply["spoken_tip"])
 
-            self.root.after(500, _wait_then_move)
+        # The move waits for the coach to finish talking; the speech thread
+        # posts "speech_idle" when its queue runs dry.
+        self._pending_move = (msg.gen, reply, time.perf_counter())
+        self._play_pending_move()
 
-        self.root.after(0, _deliver)
+    def _play_pending_move(self):
+        if self._pending_move is None:
+            return
+        gen, reply, since = self._pending_move
+        if gen != self.move_counter:
+            self._pending_move = None
+            return
+        if self._speech_busy or not self._speech_q.empty():
+            return
+        self._pending_move = None
+        LATENCY.record("speech.wait", time.perf_counter() - since)
+        if reply["pre_eval"] is not None:
+            self.eval_score = reply["pre_eval"]
+        self.execute_engine_move(reply["move"])
+        self.pre_move_eval = reply["pre_eval"] or 0.0
+        self.best_move_before = reply["best_move"]
 
     def engine_move(self):
         try:
             if self.engine and not self.board.is_game_over():
-                result = self.engine.play(
+                result = self.engine.run(self.engine.play(
                     self.board,
                     chess.engine.Limit(time=0.5)
-                )
+                ))
 
                 move_san = self.board.san(result.move)
                 self.board.push(result.move)
@@ -1396,15 +1640,18 @@ class ChessUltimate:
         self._record_capture(move)
 
         self.board.push(move)
+        self.black_time += CLOCK_INCREMENT
         self.last_move = move
         self.move_history.append(san)
         self.review_boards.append(self.board.fen())
         self.refresh_history()
-        self.opening_label.config(text=detect_opening(self.board))
+        self.opening_tracker.push(san, self.board)
+        self.opening_label.config(text=self.opening_tracker.name)
         self.redraw()
         self.speak(san)
         time.sleep(0.2)
-        winsound.Beep(600 if is_capture else 1000, 50)
+        if winsound:
+            winsound.Beep(600 if is_capture else 1000, 50)
 
         if self.board.is_game_over():
             result = self.board.result()
@@ -1412,6 +1659,7 @@ class ChessUltimate:
             self.speak_async("Game over")
         else:
             self.status_var.set("Your turn – White")
+            self._start_ponder()
 
     # ──────────────────────────────────────────────────────────────────────────
     # Undo
@@ -1420,11 +1668,14 @@ class ChessUltimate:
         if self.review_mode:
             return
 
-        # Bump counter so any background thread (engine/coach) knows to abort
+        # Bump counter and cancel the engine/coach search for the old position
         self.move_counter += 1
+        self._pending_move = None
+        if self.engine:
+            self.engine.cancel(self.move_counter)
+        self._stop_ponder()
 
-        # Release all locks and DRAIN the speech queue immediately so
-        # _wait_then_move stops looping and never calls execute_engine_move.
+        # Release all locks and DRAIN the speech queue immediately.
         self.engine_busy = False
         self.waiting_for_coach = False
         self._speech_busy = False
@@ -1448,10 +1699,13 @@ class ChessUltimate:
         if len(self.board.move_stack) >= moves_to_undo:
             for _ in range(moves_to_undo):
                 self.board.pop()
+                self.opening_tracker.pop()
             for _ in range(min(moves_to_undo, len(self.move_history))):
                 self.move_history.pop()
             for _ in range(min(moves_to_undo, len(self.review_boards))):
                 self.review_boards.pop()
+            self.review_grades = {i: g for i, g in self.review_grades.items()
+                                  if i < len(self.move_history)}
             # Undo captured pieces tracking (one entry per capture, so only
             # pop if a capture actually happened — safe to pop up to moves_to_undo)
             if moves_to_undo == 2:
@@ -1470,10 +1724,12 @@ class ChessUltimate:
             self.pre_move_eval   = 0.0
             self.best_move_before = None
             self.refresh_history()
+            self.opening_label.config(text=self.opening_tracker.name)
             self.redraw()
             self.status_var.set("Your turn – White")
             self._coach_msg("Move undone. Let's try again!", "info")
             self.engine_busy = False
+            self._start_ponder()
 
     # ──────────────────────────────────────────────────────────────────────────
     # Game over
@@ -1498,6 +1754,11 @@ class ChessUltimate:
     # ──────────────────────────────────────────────────────────────────────────
     def new_game(self):
         self.board         = chess.Board()
+        self.game_id      += 1
+        self.move_counter += 1            # drop any reply for the old game
+        self._pending_move = None
+        if self.engine:
+            self.engine.cancel(self.move_counter)
         self.last_move     = None
         self.selected_sq   = None
         self.legal_targets = set()
@@ -1506,13 +1767,16 @@ class ChessUltimate:
         self.captured_w    = []
         self.captured_b    = []
         self.review_boards = []
-        self.white_time    = 600.0
-        self.black_time    = 600.0
+        self.review_evals  = {}
+        self.review_grades = {}
+        self.white_time    = CLOCK_START
+        self.black_time    = CLOCK_START
         self.engine_busy   = False
         self.coach_highlight = None
         self.theory_arrows    = []
         self.pre_move_eval   = 0.0
         self.best_move_before = None
+        self.opening_tracker.reset()
         self.exit_review()
         self.refresh_history()
         self.opening_label.config(text="")
@@ -1528,13 +1792,115 @@ class ChessUltimate:
         if not self.review_boards:
             messagebox.showinfo("Review", "No moves to review yet.")
             return
+        self._stop_ponder()
         self.review_mode = True
         self.review_idx  = len(self.review_boards) - 1
         self.review_frame.pack(pady=4)
         self.status_var.set("Review mode – use ◀ ▶ to step through moves")
+        self._start_full_analysis()
         self._show_review_pos()
 
+    def _start_full_analysis(self):
+        """
+        Analyse every position of the game in the background: positions are
+        spread over a process pool of engines (or come from the eval cache)
+        and each result is streamed back through ui_queue as it finishes.
+        """
+        self._cancel_full_analysis()
+        if not ENGINE_PATH.exists():
+            return
+        gen = self.review_gen
+        todo = []
+        for fen in [chess.STARTING_FEN] + self.review_boards:
+            if fen in self.review_evals or fen in todo:
+                continue
+            info = self.eval_cache.get(chess.Board(fen), REVIEW_LIMIT, tag="review")
+            if info is not None:
+                self.review_evals[fen] = info
+            else:
+                todo.append(fen)
+        self._update_review_grades()
+        if not todo:
+            return
+        if self.analysis_pool is None:
+            try:
+                self.analysis_pool = AnalysisPool(engine_command(ENGINE_PATH),
+                                                  workers=max(1, cpu_cores() - 1),
+                                                  options={"Threads": 1, "Hash": 16})
+            except Exception as e:
+                print(f"Analysis pool failed: {e}")
+                return
+
+        def _done(fen, info, error):
+            self.ui_queue.put(EngineResult("review", gen, (fen, info), error))
+
+        self._review_jobs = self.analysis_pool.analyse_many(todo, REVIEW_LIMIT, _done)
+
+    def _cancel_full_analysis(self):
+        self.review_gen += 1
+        for job in self._review_jobs:
+            job.cancel()
+        self._review_jobs = []
+
+    def _on_review_result(self, msg):
+        if msg.gen != self.review_gen:
+            return
+        if msg.error is not None:
+            print(f"Review analysis failed: {msg.error}")
+            return
+        fen, info = msg.value
+        self.review_evals[fen] = info
+        self.eval_cache.put(chess.Board(fen), REVIEW_LIMIT, info, tag="review")
+        self._update_review_grades()
+        if self.review_mode:
+            self._show_review_pos()
+
+    @staticmethod
+    def _info_cp(info) -> float:
+        return float(info["score"].white().score(mate_score=3000) or 0)
+
+    def _update_review_grades(self):
+        """Grade every move whose positions before and after are both analysed."""
+        fens = [chess.STARTING_FEN] + self.review_boards
+        grades = {}
+        for i, san in enumerate(self.move_history[:len(fens) - 1]):
+            before, after = self.review_evals.get(fens[i]), self.review_evals.get(fens[i + 1])
+            if before is None or after is None:
+                continue
+            board = chess.Board(fens[i])
+            try:
+                move = board.parse_san(san)
+            except ValueError:
+                continue
+            best = before["pv"][0] if before.get("pv") else None
+            drop = mover_drop(board.turn, self._info_cp(before), self._info_cp(after))
+            grades[i] = grade_move(drop, move == best)
+        if grades != self.review_grades:
+            self.review_grades = grades
+            self.refresh_history()
+
+    def _review_summary(self) -> str:
+        """Eval, grade and analysis progress for the move shown in review."""
+        parts = []
+        fens = [chess.STARTING_FEN] + self.review_boards
+        info = self.review_evals.get(fens[self.review_idx + 1])
+        if info is not None:
+            parts.append(f"{self._info_cp(info) / 100:+.2f}")
+        grade = self.review_grades.get(self.review_idx)
+        if grade is not None:
+            text = f"{grade.capitalize()} {GRADE_SYMBOLS[grade]}".strip()
+            before = self.review_evals.get(fens[self.review_idx])
+            if grade not in ("best", "good") and before.get("pv"):
+                text += f" (best {chess.Board(fens[self.review_idx]).san(before['pv'][0])})"
+            parts.append(text)
+        unique = set(fens)
+        done = sum(1 for fen in unique if fen in self.review_evals)
+        if done < len(unique):
+            parts.append(f"analysing {done}/{len(unique)}")
+        return "  |  ".join(parts)
+
     def exit_review(self):
+        self._cancel_full_analysis()
         self.review_mode = False
         self.review_frame.pack_forget()
         self.board = chess.Board()
@@ -1544,7 +1910,11 @@ class ChessUltimate:
             try: tmp.push_san(san)
             except: break
         self.board = tmp
+        self.opening_tracker.replay(tmp)
+        self.eval_score = self.pre_move_eval
+        self.refresh_history()
         self.redraw()
+        self._start_ponder()
 
     def review_step(self, delta: int):
         if not self.review_mode:
@@ -1563,7 +1933,12 @@ class ChessUltimate:
         move_num   = self.review_idx + 1
         san        = self.move_history[self.review_idx] if self.review_idx < len(self.move_history) else "?"
         color      = "White" if move_num % 2 == 1 else "Black"
-        self.status_var.set(f"Review: move {move_num} – {color} played {san}")
+        summary    = self._review_summary()
+        info       = self.review_evals.get(self.review_boards[self.review_idx])
+        if info is not None:
+            self.eval_score = self._info_cp(info)
+        self.status_var.set(f"Review: move {move_num} – {color} played {san}"
+                            + (f"  |  {summary}" if summary else ""))
         self.last_move = None
         self.redraw()
         # Highlight reviewed move on board
@@ -1628,20 +2003,10 @@ class ChessUltimate:
             self._coach_msg("Wait for your turn to check theory.", "info")
             return
 
-        current_sequence = " ".join(
-            m.replace("x","").replace("+","").replace("#","")
-            for m in self.move_history
-        ).strip()
-
         # Gather all continuations that start from the current position
-        continuations = {}   # next_move -> opening_name
-        for moves_seq, name in self.openings.items():
-            if moves_seq.startswith(current_sequence) and moves_seq != current_sequence:
-                remainder = moves_seq[len(current_sequence):].strip()
-                parts = remainder.split()
-                next_move = parts[0]
-                if next_move not in continuations:
-                    continuations[next_move] = (name, parts)   # name + full remainder parts
+        continuations = {}   # next_move -> (opening_name, remaining line parts)
+        for next_move, name, parts in self.book_continuations():
+            continuations[next_move] = (name, parts)
 
         if not continuations:
             self._coach_msg(
@@ -1657,7 +2022,7 @@ class ChessUltimate:
         lines = [f"📖 Opening Theory\n"]
 
         # Current opening name
-        opening_now = detect_opening(self.board)
+        opening_now = self.opening_tracker.name
         if opening_now:
             lines.append(f"You are in: {opening_now}\n")
 
@@ -1735,9 +2100,14 @@ class ChessUltimate:
         return "  Why: A standard theory move improving piece activity."
 
     def __del__(self):
+        self._stop_ponder()
         if self.engine:
-            try: self.engine.quit()
+            try: self.engine.close()
             except: pass
+        if self.analysis_pool is not None:
+            self.analysis_pool.shutdown()
+        self.eval_cache.close()
+        self.coach_cache.close()
 
 
 # ── Entry point ───────────────────────────────────────────────────────────────
@@ -0,0 +1,78 @@
+"""
+time_manager.py
+===============
+How long the engine should think for its next move.
+
+allocate() starts from the usual clock split — remaining time over the
+moves probably left, plus most of the increment — capped at NORMAL_THINK,
+and scales it by how much the position deserves:
+
+    forced       only one legal move                → MIN_THINK
+    book         the position is still in the book  → x BOOK_FACTOR
+    recapture    the obvious take-back of a capture → x RECAPTURE_FACTOR
+    critical     in check, tactics on the board or  → x CRITICAL_FACTOR
+                 the eval just swung a lot
+
+and then clamps it to [MIN_THINK, MAX_THINK] (MAX_THINK keeps the GUI
+responsive even with a long clock) and to a safe share of the clock.
+The result goes into chess.engine.Limit(time=...) together with the real
+clocks, so the engine also knows how much time it has.
+"""
+
+import chess
+
+MIN_THINK        = 0.05    # seconds, never less (the engine still has to answer)
+NORMAL_THINK     = 1.0     # seconds for an ordinary move with plenty of clock
+MAX_THINK        = 2.5     # seconds, never more — the player is waiting
+CLOCK_SHARE      = 0.10    # never spend more than this share of the clock on one move
+BOOK_FACTOR      = 0.3
+RECAPTURE_FACTOR = 0.4
+CRITICAL_FACTOR  = 1.8
+CRITICAL_SWING   = 150     # cp change since the last move that counts as critical
+
+
+def moves_to_go(board: chess.Board) -> int:
+    """Rough number of moves left in the game for the side to move."""
+    return max(15, 45 - board.fullmove_number // 2)
+
+
+def is_recapture(board: chess.Board) -> bool:
+    """True when the last move was a capture that can be taken straight back."""
+    if not board.move_stack:
+        return False
+    last = board.peek()
+    board.pop()
+    try:
+        was_capture = board.is_capture(last)
+    finally:
+        board.push(last)
+    if not was_capture:
+        return False
+    return any(board.generate_legal_captures(to_mask=chess.BB_SQUARES[last.to_square]))
+
+
+def is_critical(board: chess.Board, eval_swing: float = 0.0) -> bool:
+    if board.is_check() or abs(eval_swing) >= CRITICAL_SWING:
+        return True
+    # several captures to weigh: a tactical position
+    captures = sum(1 for _ in board.generate_legal_captures())
+    return captures >= 4
+
+
+def allocate(board: chess.Board, remaining: float, increment: float = 0.0,
+             in_book: bool = False, eval_swing: float = 0.0) -> float:
+    """Seconds to think for the side to move, given its clock and increment."""
+    legal = board.legal_moves.count()
+    if legal <= 1:
+        return MIN_THINK
+
+    base = min(NORMAL_THINK, remaining / moves_to_go(board) + 0.75 * increment)
+    if in_book:
+        base *= BOOK_FACTOR
+    elif is_recapture(board):
+        base *= RECAPTURE_FACTOR
+    elif is_critical(board, eval_swing):
+        base *= CRITICAL_FACTOR
+
+    cap = min(MAX_THINK, max(MIN_THINK, remaining * CLOCK_SHARE))
+    return max(MIN_THINK, min(base, cap))